@@ -1,12 +1,43 @@
+import logging
 import os
+import re
+from functools import lru_cache
 from pathlib import Path
 from dotenv import load_dotenv
 
-BASE_DIR = Path(__file__).resolve().parents[1].parent
-load_dotenv(BASE_DIR / ".env")
+logger = logging.getLogger(__name__)
 
-# Load environment variables from a .env file if present (for development)
-load_dotenv(override=True)
+# Project root (the folder that holds bot/ and .env.example);
+# __file__ is normally already absolute, so only resolve() when it isn't
+_CONFIG_PATH = Path(__file__)
+BASE_DIR = (_CONFIG_PATH if _CONFIG_PATH.is_absolute() else _CONFIG_PATH.resolve()).parents[1]
+
+# Load environment variables from the project .env file if present (for development)
+load_dotenv(BASE_DIR / ".env", override=True)
+
+# --- Env parsing helpers (memoized, so re-imports/reloads don't re-parse) ---
+@lru_cache(maxsize=None)
+def _get_env_int(name: str, required: bool = True, default: int | None = None) -> int | None:
+    raw = os.getenv(name)
+    if raw is None or not raw.strip():
+        if required:
+            raise RuntimeError(f"{name} environment variable is not set.")
+        return default
+    return int(raw.strip())
+
+# Separator for ID lists: commas and/or whitespace ("1,2", "1, 2", "1 2")
+_ID_LIST_SPLIT = re.compile(r"[,\s]+")
+
+@lru_cache(maxsize=None)
+def _parse_int_list(raw: str) -> tuple[int, ...]:
+    return tuple(int(x) for x in _ID_LIST_SPLIT.split(raw) if x) if raw else ()
+
+@lru_cache(maxsize=None)
+def _get_env_int_list(name: str, required: bool = False) -> tuple[int, ...]:
+    raw = os.getenv(name, '')
+    if required and not raw:
+        raise RuntimeError(f"{name} environment variable is not set.")
+    return _parse_int_list(raw)
 
 # --- Configuration ---
 # Telegram bot token (required for bot operation)
@@ -15,30 +46,13 @@ if not BOT_TOKEN:
     raise RuntimeError("BOT_TOKEN environment variable is not set.")
 
 # Group chat ID for notifications or group operations (required)
-GROUP_CHAT_ID = os.getenv('GROUP_CHAT_ID')
-if not GROUP_CHAT_ID:
-    raise RuntimeError("GROUP_CHAT_ID environment variable is not set.")
-GROUP_CHAT_ID = int(GROUP_CHAT_ID)
+GROUP_CHAT_ID = _get_env_int('GROUP_CHAT_ID')
 
 # Main group chat for high-quantity orders (required)
-MAIN_GROUP_CHAT_ID = os.getenv('MAIN_GROUP_CHAT_ID')
-if not MAIN_GROUP_CHAT_ID:
-    raise RuntimeError("MAIN_GROUP_CHAT_ID environment variable is not set.")
-MAIN_GROUP_CHAT_ID = int(MAIN_GROUP_CHAT_ID)
+MAIN_GROUP_CHAT_ID = _get_env_int('MAIN_GROUP_CHAT_ID')
 
 # Long distance delivery group chat ID (required)
-CRG_GROUP_CHAT_ID = os.getenv('CRG_GROUP_CHAT_ID')
-if not CRG_GROUP_CHAT_ID:
-    raise RuntimeError("CRG_GROUP_CHAT_ID environment variable is not set.")
-CRG_GROUP_CHAT_ID = int(CRG_GROUP_CHAT_ID)
-
-def _get_env_int(name: str, required: bool = True) -> int | None:
-    raw = os.getenv(name)
-    if raw is None or not raw.strip():
-        if required:
-            raise RuntimeError(f"{name} environment variable is not set.")
-        return None
-    return int(raw.strip())
+CRG_GROUP_CHAT_ID = _get_env_int('CRG_GROUP_CHAT_ID')
 
 # 🔥 вот тут реально читаем твой PROFIT_REPORT_CHAT_ID из .env
 PROFIT_REPORT_CHAT_ID = _get_env_int("PROFIT_REPORT_CHAT_ID", required=True)
@@ -52,29 +66,24 @@ SOLANA_ADDRESS = os.getenv('SOLANA_ADDRESS', 'Please contact admin for Solana ad
 LONG_DISTANCE_ENABLED = os.getenv('LONG_DISTANCE_ENABLED', 'false').lower() in ('1', 'true', 'yes', 'on')
 
 # Channel ID to check for user membership (required)
-CHANNEL_ID_TO_CHECK = os.getenv('CHANNEL_ID_TO_CHECK')
-if not CHANNEL_ID_TO_CHECK:
-    raise RuntimeError("CHANNEL_ID_TO_CHECK environment variable is not set.")
-CHANNEL_ID_TO_CHECK = int(CHANNEL_ID_TO_CHECK)
+CHANNEL_ID_TO_CHECK = _get_env_int('CHANNEL_ID_TO_CHECK')
 SUBSCRIBE_LINK = os.getenv("SUBSCRIBE_LINK", "https://t.me/Riga_night")
 
 # Admin IDs (list of user IDs of your administrators, comma-separated in .env, required)
-ADMIN_IDS_RAW = os.getenv('ADMIN_IDS')
-if not ADMIN_IDS_RAW:
-    raise RuntimeError("ADMIN_IDS environment variable is not set.")
-ADMIN_IDS = [int(x) for x in ADMIN_IDS_RAW.split(',') if x.strip()]
+ADMIN_IDS = _get_env_int_list('ADMIN_IDS', required=True)
+# Same IDs as a frozenset for O(1) membership checks
+ADMIN_IDS_SET = frozenset(ADMIN_IDS)
 
 # Exception user IDs for order limit (optional, comma-separated in .env)
-ORDER_LIMIT_EXCEPTION_USER_IDS_RAW = os.getenv('ORDER_LIMIT_EXCEPTION_USER_IDS', '')
-ORDER_LIMIT_EXCEPTION_USER_IDS = [int(x) for x in ORDER_LIMIT_EXCEPTION_USER_IDS_RAW.split(',') if x.strip()]
+ORDER_LIMIT_EXCEPTION_USER_IDS = frozenset(_get_env_int_list('ORDER_LIMIT_EXCEPTION_USER_IDS'))
 
 # Primary admin for order cancellation approval
 PRIMARY_ADMIN_ID_RAW = os.getenv('PRIMARY_ADMIN_ID')
-print(f"[DEBUG] PRIMARY_ADMIN_ID_RAW from environment: {PRIMARY_ADMIN_ID_RAW}")
+logger.debug("PRIMARY_ADMIN_ID_RAW from environment: %s", PRIMARY_ADMIN_ID_RAW)
 if not PRIMARY_ADMIN_ID_RAW:
     raise RuntimeError("PRIMARY_ADMIN_ID environment variable is not set.")
 PRIMARY_ADMIN_ID = int(PRIMARY_ADMIN_ID_RAW)
-print(f"[DEBUG] PRIMARY_ADMIN_ID converted to int: {PRIMARY_ADMIN_ID}")
+logger.debug("PRIMARY_ADMIN_ID converted to int: %s", PRIMARY_ADMIN_ID)
 
 # Data file paths (relative to project root)
 # Base directory for all data files
@@ -97,13 +106,12 @@ LOYALTY_PERCENTAGE = 10  # Percentage bonus (10%)
 LOYALTY_BONUS_NAME = "🥦 Loyalty Bonus"  # Name for the bonus item
 
 # Loyalty bonus exceptions (users who should not benefit from loyalty bonuses)
-LOYALTY_EXCEPTION_USER_IDS_RAW = os.getenv('LOYALTY_EXCEPTION_USER_IDS', '')
-LOYALTY_EXCEPTION_USER_IDS = [int(x) for x in LOYALTY_EXCEPTION_USER_IDS_RAW.split(',') if x.strip()]
+LOYALTY_EXCEPTION_USER_IDS = frozenset(_get_env_int_list('LOYALTY_EXCEPTION_USER_IDS'))
 
 # --- Late Delivery Notifier Configuration ---
-LATE_DELIVERY_CHECK_INTERVAL_MINUTES = int(os.getenv('LATE_DELIVERY_CHECK_INTERVAL_MINUTES', '1'))  # Default 1 minute
+LATE_DELIVERY_CHECK_INTERVAL_MINUTES = _get_env_int('LATE_DELIVERY_CHECK_INTERVAL_MINUTES', required=False, default=1)  # Default 1 minute
 
 # --- Large Order Balance Configuration ---
 # Maximum difference in order counts between couriers for large orders (5+ quantity)
 # This prevents one courier from having too many more orders than others
-MAX_LARGE_ORDER_COUNT_DIFFERENCE = int(os.getenv('MAX_LARGE_ORDER_COUNT_DIFFERENCE', '2'))  # Default 2 orders difference
+MAX_LARGE_ORDER_COUNT_DIFFERENCE = _get_env_int('MAX_LARGE_ORDER_COUNT_DIFFERENCE', required=False, default=2)  # Default 2 orders difference
@@ -1,44 +1,92 @@
-import json
+import asyncio
+import logging
+from datetime import timedelta
+from pathlib import Path
+from typing import Optional
+
+import orjson
 from telegram import Update
+from telegram.error import Forbidden, RetryAfter, TelegramError
 from telegram.ext import ContextTypes
-from bot.config import ADMIN_IDS
-from bot.utils.data import load_user_ids
+from bot.config import ADMIN_IDS_SET
+from bot.utils.data import atomic_write_bytes, load_user_ids_int, load_username_index
+from bot.utils.rate_limit import RateLimiter
 
 # импортируем новые функции
 from bot.handlers.spy import set_spy_status_for_admin, get_spy_status_for_admin
 
-SHOP_STATUS_FILE = "data/shop_status.json"
+logger = logging.getLogger(__name__)
+
+SHOP_STATUS_FILE = Path("data/shop_status.json")
+
+# Кэш статуса магазина: None — ещё не читали файл
+_SHOP_STATUS_CACHE: Optional[bool] = None
+
+# Telegram позволяет ~30 сообщений в секунду: темп рассылки держит token bucket,
+# семафор лишь ограничивает число запросов в полёте
+_BROADCAST_LIMITER = RateLimiter(30)
+_BROADCAST_SEMAPHORE = asyncio.Semaphore(30)
+
+# Тексты рассылки об открытии магазина по языкам
+_OPEN_SHOP_MSGS = {
+    "ru": "🟢 Магазин открыт! Мы принимаем заказы 🍹",
+    "en": "🟢 The shop is now open for orders! 🍹",
+    "lv": "🟢 Veikals ir atvērts pasūtījumiem! 🍹",
+}
+_OPEN_SHOP_DEFAULT = _OPEN_SHOP_MSGS["ru"]
 
 
 # ===== Вспомогательные функции =====
 
 def is_admin(user_id: int) -> bool:
     """Проверка, является ли пользователь админом"""
-    # ADMIN_IDS может быть списком или строкой
-    try:
-        if isinstance(ADMIN_IDS, (list, tuple, set)):
-            return int(user_id) in {int(x) for x in ADMIN_IDS if x}
-        if isinstance(ADMIN_IDS, str):
-            parts = [p.strip() for p in ADMIN_IDS.split(",") if p.strip()]
-            return str(user_id) in parts or int(user_id) in {int(p) for p in parts}
-    except Exception:
-        pass
-    return False
+    return user_id in ADMIN_IDS_SET
+
+
+async def _send_one(bot, chat_id: int, text: str, **kwargs) -> int:
+    """Отправить одно сообщение рассылки; 1 — успешно, 0 — ошибка"""
+    async with _BROADCAST_SEMAPHORE:
+        for attempt in range(2):
+            await _BROADCAST_LIMITER.acquire()
+            try:
+                await bot.send_message(chat_id, text, **kwargs)
+                return 1
+            except Forbidden:
+                # пользователь заблокировал бота — это нормально
+                return 0
+            except RetryAfter as e:
+                # упёрлись в лимит Telegram — ждём и пробуем ещё раз (один раз)
+                if attempt:
+                    logger.warning("Broadcast to %s hit flood limit twice, skipping", chat_id)
+                    return 0
+                delay = e.retry_after
+                if isinstance(delay, timedelta):
+                    delay = delay.total_seconds()
+                await asyncio.sleep(delay)
+            except TelegramError as e:
+                logger.debug("Broadcast to %s failed: %s", chat_id, e)
+                return 0
+        return 0
 
 
 def set_shop_status(is_open: bool):
-    """Сохранить статус магазина в файл"""
-    with open(SHOP_STATUS_FILE, "w", encoding="utf-8") as f:
-        json.dump({"open": is_open}, f)
+    """Сохранить статус магазина в файл и обновить кэш"""
+    global _SHOP_STATUS_CACHE
+    atomic_write_bytes(SHOP_STATUS_FILE, orjson.dumps({"open": is_open}))
+    _SHOP_STATUS_CACHE = is_open
 
 
 def get_shop_status() -> bool:
-    """Проверить, открыт ли магазин"""
+    """Проверить, открыт ли магазин (файл читается только при первом вызове, дальше — кэш до set_shop_status)"""
+    global _SHOP_STATUS_CACHE
+    if _SHOP_STATUS_CACHE is not None:
+        return _SHOP_STATUS_CACHE
     try:
-        with open(SHOP_STATUS_FILE, "r", encoding="utf-8") as f:
-            return json.load(f).get("open", False)
+        _SHOP_STATUS_CACHE = bool(orjson.loads(SHOP_STATUS_FILE.read_bytes()).get("open", False))
     except Exception:
-        return False
+        # нет файла / битый файл — магазин закрыт; запоминаем, чтобы не лезть в файл на каждый /start
+        _SHOP_STATUS_CACHE = False
+    return _SHOP_STATUS_CACHE
 
 
 # ===== Команды для админа =====
@@ -53,18 +101,13 @@ async def open_shop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     set_shop_status(True)
     await update.message.reply_text("🟢 Магазин открыт для заказов!")
 
-    users = load_user_ids()
+    users = load_user_ids_int()
+    sends = []
     for uid, info in users.items():
         lang = next(iter(info.values()), "ru") if isinstance(info, dict) else "ru"
-        text = {
-            "ru": "🟢 Магазин открыт! Мы принимаем заказы 🍹",
-            "en": "🟢 The shop is now open for orders! 🍹",
-            "lv": "🟢 Veikals ir atvērts pasūtījumiem! 🍹",
-        }.get(lang, "🟢 Магазин открыт! Мы принимаем заказы 🍹")
-        try:
-            await context.bot.send_message(int(uid), text)
-        except Exception:
-            continue
+        text = _OPEN_SHOP_MSGS.get(lang, _OPEN_SHOP_DEFAULT)
+        sends.append(_send_one(context.bot, uid, text))
+    await asyncio.gather(*sends)
 
 
 async def close_shop_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
@@ -92,19 +135,14 @@ async def msg_all_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     message_text = " ".join(context.args).strip()
-    users = load_user_ids()
+    users = load_user_ids_int()
+    payload = f"{message_text}\n\n———\n🤖 <b>This is automatic system message</b>\n"
 
-    count = 0
-    for uid in users.keys():
-        try:
-            await context.bot.send_message(
-                int(uid),
-                f"{message_text}\n\n———\n🤖 <b>This is automatic system message</b>\n",
-                parse_mode="HTML",
-            )
-            count += 1
-        except Exception:
-            continue
+    results = await asyncio.gather(*(
+        _send_one(context.bot, uid, payload, parse_mode="HTML")
+        for uid in users.keys()
+    ))
+    count = sum(results)
 
     await update.message.reply_text(f"✅ Сообщение успешно отправлено {count} пользователям.")
 
@@ -123,18 +161,8 @@ async def msg_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     target = context.args[0].replace("@", "").strip()
     message_text = " ".join(context.args[1:]).strip()
 
-    users = load_user_ids()
-    target_id = None
-
-    # 🔍 Поиск по username внутри словаря user_ids.json
-    for uid, info in users.items():
-        if isinstance(info, dict):
-            for username, lang in info.items():
-                if username.lower() == target.lower():
-                    target_id = int(uid)
-                    break
-        if target_id:
-            break
+    # 🔍 Поиск по username через индекс user_ids.json
+    target_id = load_username_index().get(target.lower())
 
     # если не нашли по username, пробуем как ID
     if target_id is None:
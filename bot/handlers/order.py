@@ -1,10 +1,16 @@
 import os
-import json
 import logging
 import asyncio
+import time
+from functools import lru_cache
 from datetime import datetime, timedelta
+from pathlib import Path
 from typing import Any, Dict, List, Optional, Tuple
-from bot.utils.data import add_user_message, load_user_ids
+from urllib.parse import quote_plus
+
+import orjson
+from cachetools import TTLCache
+from bot.utils.data import add_user_message, load_user_messages, clear_user_messages, resolve_user, atomic_write_bytes
 from bot.handlers.profit_report import send_profit_report
 from bot.handlers.spy import notify_admins_order_status
 
@@ -16,19 +22,33 @@ from telegram import (
 from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 
-from bot.config import GROUP_CHAT_ID, ADMIN_IDS
+from bot.config import GROUP_CHAT_ID, ADMIN_IDS_SET
 from bot.utils.data import load_drinks
 from bot.services.order_service import (
-    create_order_log,             # kept for backward compatibility
     generate_random_delivery_no,
     get_next_display_no,
+    register_order_file,
 )
 
 # ====== In-memory stores ======
-user_sessions: Dict[int, Dict[str, Any]] = {}
-user_order_progress: Dict[int, Dict[str, Any]] = {}  # waiting for quantity input
-_group_message_registry: Dict[int, Tuple[int, int]] = {}
-_courier_dm_registry: Dict[Tuple[int, int], int] = {}
+# Bounded TTL caches so abandoned flows and old order messages don't pile up forever:
+# sessions live for an hour, message registries until the next workday.
+SESSION_TTL_SECONDS = 3600
+REGISTRY_TTL_SECONDS = 24 * 3600
+REGISTRY_SWEEP_INTERVAL_SECONDS = 600
+
+user_sessions: Dict[int, Dict[str, Any]] = TTLCache(maxsize=1000, ttl=SESSION_TTL_SECONDS)
+user_order_progress: Dict[int, Dict[str, Any]] = TTLCache(maxsize=1000, ttl=SESSION_TTL_SECONDS)  # waiting for quantity input
+_group_message_registry: Dict[int, Tuple[int, int]] = TTLCache(maxsize=10_000, ttl=REGISTRY_TTL_SECONDS)
+_courier_dm_registry: Dict[Tuple[int, int], int] = TTLCache(maxsize=10_000, ttl=REGISTRY_TTL_SECONDS)
+# Рабочий набор заказов: (day_key, display_no) -> (mtime_ns файла, order)
+_order_cache: Dict[Tuple[str, int], Tuple[int, Dict[str, Any]]] = TTLCache(maxsize=2000, ttl=REGISTRY_TTL_SECONDS)
+# display_no -> рабочий день, где заказ с этим номером последний раз читался/писался
+_order_day: Dict[int, str] = TTLCache(maxsize=2000, ttl=REGISTRY_TTL_SECONDS)
+# Scheduled delayed deletes, tracked so they can be cancelled on shutdown
+_pending_deletes: "set[asyncio.Task]" = set()
+# data derived from the dict load_drinks() returns, rebuilt when it hands back a new one
+_drinks_cache: Dict[str, Any] = {"data": None, "index": {}, "summaries": {}, "version": 0, "fmt": 0}
 
 
 # ====== Helpers ======
@@ -41,6 +61,117 @@ def tr(lang: str, en: str, ru: str, lv: str) -> str:
     return en
 
 
+# Per-language lookup for (en, ru, lv) translation triples
+_TR_INDEX = {"en": 0, "ru": 1, "lv": 2}
+
+
+def trs(lang: str, triple: Tuple[str, str, str]) -> str:
+    return triple[_TR_INDEX.get(lang, 0)]
+
+
+# Static UI strings as (en, ru, lv) triples, built once at import
+T_NO_ITEMS = ("_(no items)_", "_(нет товаров)_", "_(nav preču)_")
+T_CHOOSE_TIME = (
+    "🕒 Please choose a delivery time:",
+    "🕒 Пожалуйста, выберите время доставки:",
+    "🕒 Lūdzu, izvēlieties piegādes laiku:",
+)
+T_CHOOSE_CATEGORY = ("🍾 Choose a category:", "🍾 Выберите категорию:", "🍾 Izvēlieties kategoriju:")
+T_CHOOSE_DRINK = ("🍸 Choose a drink:", "🍸 Выберите напиток:", "🍸 Izvēlieties dzērienu:")
+T_ADD_DRINKS = ("➕ Add drinks", "➕ Добавить напитки", "➕ Pievienot dzērienus")
+T_ENTER_REGION = ("📍 Enter your region:", "📍 Введите район:", "📍 Ievadiet savu rajonu:")
+T_PAY_CASH = ("Cash", "Наличные", "Skaidrā naudā")
+T_PAY_CARD = ("Card", "Карта", "Karte")
+T_NEW_ORDER = ("🛒 New order", "🛒 Новый заказ", "🛒 Jauns pasūtījums")
+T_ORDER_CANCELLED = (
+    "❌ Your order has been cancelled.\n\n🛍 You can start a new order anytime!",
+    "❌ Ваш заказ отменён.\n\n🛍 Вы можете оформить новый заказ в любое время!",
+    "❌ Jūsu pasūtījums tika atcelts.\n\n🛍 Jūs varat veikt jaunu pasūtījumu jebkurā laikā!",
+)
+T_BACK = ("⬅️ Back", "⬅️ Назад", "⬅️ Atpakaļ")
+T_CONFIRM = ("✅ Confirm", "✅ Подтвердить", "✅ Apstiprināt")
+T_CANCEL = ("❌ Cancel", "❌ Отменить", "❌ Atcelt")
+T_BTN_CASH = ("💵 Cash", "💵 Наличные", "💵 Skaidrā naudā")
+T_BTN_CARD = ("💳 Card", "💳 Карта", "💳 Karte")
+T_NO_NOTE = ("(no note)", "(без примечания)", "(bez piezīmes)")
+T_ORDER_SUMMARY = ("Order summary", "Сводка заказа", "Pasūtījuma kopsavilkums")
+T_TOTAL = ("Total", "Итого", "Kopā")
+T_INVALID_NUMBER = (
+    "❌ Please enter a valid number.",
+    "❌ Пожалуйста, введите корректное число.",
+    "❌ Lūdzu, ievadiet derīgu skaitli.",
+)
+T_ANOTHER_DRINK = ("➕ Another drink", "➕ Ещё напиток", "➕ Vēl viens dzēriens")
+T_CHECKOUT = ("✅ Checkout", "✅ Оформить заказ", "✅ Apstiprināt pasūtījumu")
+T_WHAT_NEXT = ("What would you like to do next?", "Что делаем дальше?", "Ko vēlaties darīt tālāk?")
+T_SEND_LOCATION = (
+    "📌 Send your location (📎 → Location) or type your address:",
+    "📌 Отправьте геолокацию (📎 → Геопозиция) или введите адрес:",
+    "📌 Nosūtiet atrašanās vietu (📎 → Location) vai ievadiet adresi:",
+)
+T_ENTER_NOTE = (
+    "📝 Enter a note for courier (or type 'skip'):",
+    "📝 Добавьте примечание для курьера (или введите 'skip'):",
+    "📝 Pievienojiet piezīmi kurjeram (vai rakstiet 'skip'):",
+)
+T_HOW_MANY = ("🍻 How many of {name}?", "🍻 Сколько {name}?", "🍻 Cik {name}?")
+T_CHOOSE_PAYMENT = ("💳 Choose payment method:", "💳 Выберите способ оплаты:", "💳 Izvēlieties maksājuma veidu:")
+
+# Templates for dynamic messages: only the chosen language gets formatted (str.format)
+T_BALANCE = (
+    "💵 Current total: {total:.2f}€\n\n",
+    "💵 Сейчас в корзине: {total:.2f}€\n\n",
+    "💵 Pašlaik grozā: {total:.2f}€\n\n",
+)
+# ИСПРАВЛЕНО: 15.00€ -> 25.00€
+T_BALANCE_SHORT = (
+    "💵 Current total: {total:.2f}€\n🧾 You need {diff:.2f}€ more to reach the minimum order (25.00€).\n\n",
+    "💵 Сейчас в корзине: {total:.2f}€\n🧾 Осталось добавить: {diff:.2f}€, чтобы оформить заказ (мин. 25.00€).\n\n",
+    "💵 Pašlaik grozā: {total:.2f}€\n🧾 Jums jāpieliek vēl {diff:.2f}€, lai sasniegtu minimālo pasūtījumu (25.00€).\n\n",
+)
+# ИСПРАВЛЕНО: 15.00€ -> 25.00€
+T_MIN_ORDER = (
+    (
+        "❌ Minimum order amount is 25.00€.\n"
+        "💵 Your current total is {total:.2f}€.\n"
+        "🧾 You need to add {diff:.2f}€ more to continue.\n\n"
+        "🛍 Please add more drinks to your cart."
+    ),
+    (
+        "❌ Минимальная сумма заказа — 25.00€.\n"
+        "💵 Сейчас в корзине: {total:.2f}€.\n"
+        "🧾 Добавьте ещё на {diff:.2f}€, чтобы оформить заказ.\n\n"
+        "🛍 Пожалуйста, выберите дополнительные напитки."
+    ),
+    (
+        "❌ Minimālā pasūtījuma summa ir 25.00€.\n"
+        "💵 Jūsu pašreizējā summa: {total:.2f}€.\n"
+        "🧾 Jums jāpieliek vēl {diff:.2f}€, lai turpinātu.\n\n"
+        "🛍 Lūdzu, pievienojiet vēl dzērienus grozam."
+    ),
+)
+T_ORDER_PLACED = (
+    "✅ Your order #{delivery_no} has been successfully placed!\n\n💵 Total: {total:.2f}€\nAwaiting courier confirmation...",
+    "✅ Ваш заказ #{delivery_no} успешно оформлен!\n\n💵 Итого: {total:.2f}€\nОжидаем подтверждение курьером...",
+    "✅ Jūsu pasūtījums #{delivery_no} ir veiksmīgi noformēts!\n\n💵 Kopā: {total:.2f}€\nGaidām kurjera apstiprinājumu...",
+)
+T_ADDED_TO_CART = (
+    "✅ You added {qty} × {name} = {total_price:.2f}€ to the cart 🛒",
+    "✅ Вы добавили {qty} × {name} = {total_price:.2f}€ в корзину 🛒",
+    "✅ Jūs pievienojāt {qty} × {name} = {total_price:.2f}€ grozam 🛒",
+)
+T_ORDER_ACCEPTED = (
+    "✅ Your order #{delivery_no} has been accepted by {courier}.",
+    "✅ Ваш заказ #{delivery_no} был принят {courier}.",
+    "✅ Jūsu pasūtījumu #{delivery_no} pieņēma {courier}.",
+)
+T_ORDER_DELIVERED = (
+    "✅ Your order #{delivery_no} has been delivered! Enjoy! 🎉",
+    "✅ Ваш заказ #{delivery_no} был доставлен! Приятного вечера! 🎉",
+    "✅ Jūsu pasūtījums #{delivery_no} ir piegādāts! Lai jauka diena! 🎉",
+)
+
+
 def fmt_money(x: Any) -> str:
     try:
         return f"{float(x):.2f}€"
@@ -56,23 +187,25 @@ def build_maps_links(location):
         return None
 
     if isinstance(location, dict) and "latitude" in location and "longitude" in location:
-        lat, lon = location["latitude"], location["longitude"]
-        google = f"https://www.google.com/maps/search/?api=1&query={lat},{lon}"
-        waze = f"https://waze.com/ul?q={lat},{lon}&navigate=yes"
-        return f"<a href='{google}'>Google Maps</a> | <a href='{waze}'>Waze</a>"
+        return _maps_links_for_query(f"{location['latitude']},{location['longitude']}")
 
     if isinstance(location, str):
-        query = location.replace(" ", "+")
-        google = f"https://www.google.com/maps/search/?api=1&query={query}"
-        waze = f"https://waze.com/ul?q={query}&navigate=yes"
-        return f"<a href='{google}'>Google Maps</a> | <a href='{waze}'>Waze</a>"
+        # quote_plus: пробелы → '+', кириллица и спецсимволы корректно кодируются
+        return _maps_links_for_query(quote_plus(location))
 
     return None
 
 
+@lru_cache(maxsize=1024)
+def _maps_links_for_query(query: str) -> str:
+    google = f"https://www.google.com/maps/search/?api=1&query={query}"
+    waze = f"https://waze.com/ul?q={query}&navigate=yes"
+    return f"<a href='{google}'>Google Maps</a> | <a href='{waze}'>Waze</a>"
+
+
 def cart_summary(items: List[Dict[str, Any]], lang: str) -> str:
     if not items:
-        return tr(lang, "_(no items)_", "_(нет товаров)_", "_(nav preču)_")
+        return trs(lang, T_NO_ITEMS)
     lines = []
     for it in items:
         n = it.get("name", "-")
@@ -82,21 +215,51 @@ def cart_summary(items: List[Dict[str, Any]], lang: str) -> str:
     return "\n".join(lines)
 
 
+def cart_total(data: Dict[str, Any]) -> float:
+    """Cart total kept incrementally in session data (falls back to summing items)."""
+    total = data.get("total")
+    if total is None:
+        total = sum(float(it.get("sum", 0)) for it in data.get("items", []))
+    return total
+
+
 def now_local() -> datetime:
     return datetime.now()
 
 
+# (minute bucket, day_key) — ключ текущего рабочего дня меняется не чаще раза в минуту
+_workday_key_cache: Tuple[int, str] = (-1, "")
+
+
 def get_workday_key(dt: Optional[datetime] = None) -> str:
-    dt = dt or now_local()
+    global _workday_key_cache
+    if dt is None:
+        minute = int(time.time()) // 60
+        if _workday_key_cache[0] == minute:
+            return _workday_key_cache[1]
+        key = _compute_workday_key(now_local())
+        _workday_key_cache = (minute, key)
+        return key
+    return _compute_workday_key(dt)
+
+
+def _compute_workday_key(dt: datetime) -> str:
     # ИСПРАВЛЕНО: Сдвигаем рабочий день с 8 до 4 утра для ночной работы
     if dt.hour < 4:
         dt = dt - timedelta(days=1)
     return dt.strftime("%Y-%m-%d")
 
 
+# day_key → созданная папка заказов; makedirs вызывается один раз за рабочий день
+_orders_dir_cache: Dict[str, str] = {}
+
+
 def ensure_orders_dir(day_key: str) -> str:
-    base = os.path.join("data", "orders", day_key)
-    os.makedirs(base, exist_ok=True)
+    base = _orders_dir_cache.get(day_key)
+    if base is None:
+        base = os.path.join("data", "orders", day_key)
+        os.makedirs(base, exist_ok=True)
+        _orders_dir_cache[day_key] = base
     return base
 
 
@@ -119,47 +282,137 @@ async def clean_chat(update: Update, context: ContextTypes.DEFAULT_TYPE):
     except Exception:
         pass
 
+async def sweep_expired_entries(context: ContextTypes.DEFAULT_TYPE):
+    """
+    Repeating job (every REGISTRY_SWEEP_INTERVAL_SECONDS): drop expired sessions/registry
+    entries even when nothing writes to them.
+    """
+    for cache in (user_sessions, user_order_progress, _group_message_registry, _courier_dm_registry, _order_cache, _order_day):
+        cache.expire()
+
+
+async def _cleanup_prev(context: ContextTypes.DEFAULT_TYPE, query):
+    """Delete the pressed message and the previous bot prompt concurrently (errors ignored)."""
+    last_id = context.user_data.pop("last_bot_message_id", None)
+    if last_id:
+        await asyncio.gather(
+            query.message.delete(),
+            context.bot.delete_message(query.message.chat_id, last_id),
+            return_exceptions=True,
+        )
+    else:
+        await asyncio.gather(query.message.delete(), return_exceptions=True)
+
+
 async def _delete_later(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, seconds: int = 5):
     try:
         await asyncio.sleep(seconds)
-        await context.bot.delete_message(chat_id, message_id)
+        # once the delay is over, let the API call finish even if the task gets cancelled
+        await asyncio.shield(context.bot.delete_message(chat_id, message_id))
+    except asyncio.CancelledError:
+        raise
     except Exception:
         pass
 
 
+def schedule_delete(context: ContextTypes.DEFAULT_TYPE, chat_id: int, message_id: int, seconds: int = 5) -> asyncio.Task:
+    """Delete a message after `seconds` in the background; never blocks the caller."""
+    task = asyncio.create_task(_delete_later(context, chat_id, message_id, seconds))
+    _pending_deletes.add(task)
+    task.add_done_callback(_pending_deletes.discard)
+    return task
+
+
+async def cancel_pending_deletes():
+    """Cancel scheduled deletes that haven't fired yet (call on shutdown)."""
+    tasks = list(_pending_deletes)
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
 # ====== NEW drinks.json adapter helpers ======
 
-def _is_new_format(drinks_data: Any) -> bool:
-    return isinstance(drinks_data, dict) and "categories" not in drinks_data
+def _get_drinks_cached() -> Any:
+    """Return drinks data; index/format/summaries are rebuilt only when load_drinks() returns a new dict."""
+    data = load_drinks()  # сам кэширует по (mtime_ns, size) — второй stat здесь не нужен
+    if data is not _drinks_cache["data"]:
+        _drinks_cache["data"] = data
+        _drinks_cache["fmt"] = _detect_format(data)
+        _drinks_cache["index"] = _build_drink_index(data)
+        _drinks_cache["summaries"] = {}
+        _drinks_cache["version"] += 1
+    return data
+
+
+def _build_drink_index(drinks_data: Any) -> Dict[str, dict]:
+    """Flatten drinks data into {str(drink_id): drink_obj} (works for both formats)."""
+    index: Dict[str, dict] = {}
+    if _detect_format(drinks_data) == FMT_NEW:
+        for _, cat in drinks_data.items():
+            for did, dobj in (cat.get("items") or {}).items():
+                index.setdefault(str(did), dobj)
+    else:
+        for cat in drinks_data.get("categories", []):
+            for d in cat.get("drinks", []):
+                index.setdefault(str(d.get("id")), d)
+    return index
+
+
+# Формат drinks.json определяется один раз при загрузке и хранится в _drinks_cache["fmt"]
+FMT_NEW = 0
+FMT_OLD = 1
+
+
+def _detect_format(drinks_data: Any) -> int:
+    if isinstance(drinks_data, dict) and "categories" not in drinks_data:
+        return FMT_NEW
+    return FMT_OLD
+
+
+def _drinks_format(drinks_data: Any) -> int:
+    """Format stamp for the cached drinks data; falls back to detection for foreign objects."""
+    if drinks_data is _drinks_cache["data"]:
+        return _drinks_cache["fmt"]
+    return _detect_format(drinks_data)
+
+
+def _iter_cats_new(drinks_data: Any, lang: str):
+    for cat_id, cat in drinks_data.items():
+        name_map = cat.get("name", {})
+        yield cat_id, name_map.get(lang) or name_map.get("en") or next(iter(name_map.values()), cat_id)
+
+
+def _iter_cats_old(drinks_data: Any, lang: str):
+    for cat in drinks_data.get("categories", []):
+        name_map = (cat.get("name") or {})
+        yield cat.get("id"), name_map.get(lang) or name_map.get("en") or next(iter(name_map.values()), cat.get("id"))
+
+
+def _drinks_in_cat_new(drinks_data: Any, cat_id: str):
+    cat = drinks_data.get(cat_id) or {}
+    return list((cat.get("items") or {}).items())
+
+
+def _drinks_in_cat_old(drinks_data: Any, cat_id: str):
+    for cat in drinks_data.get("categories", []):
+        if str(cat.get("id")) == str(cat_id):
+            return [(d.get("id"), d) for d in cat.get("drinks", [])]
+    return []
+
+
+_ITER_CATS = (_iter_cats_new, _iter_cats_old)
+_DRINKS_IN_CAT = (_drinks_in_cat_new, _drinks_in_cat_old)
 
 
 def iter_categories(drinks_data: Any, lang: str):
     """Yield (cat_id, localized_name) for both new and old formats."""
-    if _is_new_format(drinks_data):
-        for cat_id, cat in drinks_data.items():
-            name_map = cat.get("name", {})
-            yield cat_id, name_map.get(lang) or name_map.get("en") or next(iter(name_map.values()), cat_id)
-    else:
-        for cat in drinks_data.get("categories", []):
-            name_map = (cat.get("name") or {})
-            yield cat.get("id"), name_map.get(lang) or name_map.get("en") or next(iter(name_map.values()), cat.get("id"))
+    return _ITER_CATS[_drinks_format(drinks_data)](drinks_data, lang)
 
 
 def get_drinks_in_category(drinks_data: Any, cat_id: str):
     """Return list of tuples [(drink_id, drink_obj)] for both formats."""
-    result = []
-    if _is_new_format(drinks_data):
-        cat = drinks_data.get(cat_id) or {}
-        items = cat.get("items") or {}
-        for did, dobj in items.items():
-            result.append((did, dobj))
-    else:
-        for cat in drinks_data.get("categories", []):
-            if str(cat.get("id")) == str(cat_id):
-                for d in cat.get("drinks", []):
-                    result.append((d.get("id"), d))
-                break
-    return result
+    return _DRINKS_IN_CAT[_drinks_format(drinks_data)](drinks_data, cat_id)
 
 
 def get_drink_display_name(drink_obj: dict, lang: str) -> str:
@@ -181,17 +434,30 @@ def get_drink_price(drink_obj: dict) -> float:
 
 def find_drink_by_id(drinks_data: Any, drink_id: str) -> Optional[dict]:
     """Find a drink by id and return its object (works for both formats)."""
-    if _is_new_format(drinks_data):
-        for _, cat in drinks_data.items():
-            for did, dobj in (cat.get("items") or {}).items():
-                if str(did) == str(drink_id):
-                    return dobj
+    if drinks_data is _drinks_cache["data"]:
+        index = _drinks_cache["index"]
     else:
-        for cat in drinks_data.get("categories", []):
-            for d in cat.get("drinks", []):
-                if str(d.get("id")) == str(drink_id):
-                    return d
-    return None
+        index = _build_drink_index(drinks_data)
+    return index.get(str(drink_id))
+
+
+def find_drink_summary(drinks_data: Any, drink_id: str) -> Optional[Tuple[str, Dict[str, str], float]]:
+    """
+    Compact view of a drink for the quantity step: (drink_id, {lang: name}, price).
+    Memoized per drinks.json version, so the quantity path never touches drinks_data.
+    """
+    cached = drinks_data is _drinks_cache["data"]
+    key = str(drink_id)
+    if cached and key in _drinks_cache["summaries"]:
+        return _drinks_cache["summaries"][key]
+
+    drink = find_drink_by_id(drinks_data, key)
+    if not drink:
+        return None
+    summary = (key, {l: get_drink_display_name(drink, l) for l in _TR_INDEX}, get_drink_price(drink))
+    if cached:
+        _drinks_cache["summaries"][key] = summary
+    return summary
 
 
 # ====== Start / Flow ======
@@ -208,16 +474,17 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     context.user_data["cart"] = []
 
     msg = await update.effective_message.reply_text(
-        tr(lang,
-           "🕒 Please choose a delivery time:",
-           "🕒 Пожалуйста, выберите время доставки:",
-           "🕒 Lūdzu, izvēlieties piegādes laiku:")
+        trs(lang, T_CHOOSE_TIME)
         , reply_markup=build_time_keyboard(),
     )
     context.user_data["last_bot_message_id"] = msg.message_id
 
 
 def build_time_keyboard() -> InlineKeyboardMarkup:
+    return _TIME_KEYBOARD
+
+
+def _make_time_keyboard() -> InlineKeyboardMarkup:
     slots: List[Tuple[str, str]] = []
     for h in range(20, 24):
         s, e = f"{h:02d}:00", f"{(h + 1) % 24:02d}:00"
@@ -230,6 +497,10 @@ def build_time_keyboard() -> InlineKeyboardMarkup:
     )
 
 
+# Static keyboard: same slots for every user and language, built once at import
+_TIME_KEYBOARD = _make_time_keyboard()
+
+
 # ====== Callback handler ======
 async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TYPE):
     query = update.callback_query
@@ -240,11 +511,15 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
     data = query.data
     user = query.from_user
     user_id = user.id
-    lang = context.user_data.get("lang", "en")
+    # hot attributes bound once per click
+    ud = context.user_data
+    send = context.bot.send_message
+    chat_id = query.message.chat_id if query.message else user_id
+    lang = ud.get("lang", "en")
     session = user_sessions.get(user_id)
 
-    # Always load fresh drinks (auto-reload without restart)
-    drinks_data = load_drinks()
+    # Cached drinks (still auto-reloads without restart when drinks.json changes)
+    drinks_data = _get_drinks_cached()
 
     # ---- Customer flow ----
     if session:
@@ -253,24 +528,15 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             session["data"]["time"] = data.split(":", 1)[1]
             session["step"] = "category"
 
-            try:
-                await query.message.delete()
-            except Exception:
-                pass
-            try:
-                last_id = context.user_data.pop("last_bot_message_id", None)
-                if last_id:
-                    await context.bot.delete_message(query.message.chat_id, last_id)
-            except Exception:
-                pass
+            await _cleanup_prev(context, query)
 
             kb = build_category_keyboard(drinks_data, lang)
-            msg = await context.bot.send_message(
-                chat_id=query.message.chat_id,
-                text=tr(lang, "🍾 Choose a category:", "🍾 Выберите категорию:", "🍾 Izvēlieties kategoriju:"),
+            msg = await send(
+                chat_id=chat_id,
+                text=trs(lang, T_CHOOSE_CATEGORY),
                 reply_markup=kb,
             )
-            context.user_data["last_bot_message_id"] = msg.message_id
+            ud["last_bot_message_id"] = msg.message_id
             return
 
         # category selected → delete category message, then show drinks
@@ -279,154 +545,86 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             session["data"]["category"] = cat_id
             session["step"] = "drink"
 
-            try:
-                await query.message.delete()
-            except Exception:
-                pass
-            try:
-                last_id = context.user_data.pop("last_bot_message_id", None)
-                if last_id:
-                    await context.bot.delete_message(query.message.chat_id, last_id)
-            except Exception:
-                pass
+            await _cleanup_prev(context, query)
 
             kb = build_drinks_keyboard(drinks_data, cat_id, lang)
-            msg = await context.bot.send_message(
-                chat_id=query.message.chat_id,
-                text=tr(lang, "🍸 Choose a drink:", "🍸 Выберите напиток:", "🍸 Izvēlieties dzērienu:"),
+            msg = await send(
+                chat_id=chat_id,
+                text=trs(lang, T_CHOOSE_DRINK),
                 reply_markup=kb,
             )
-            context.user_data["last_bot_message_id"] = msg.message_id
+            ud["last_bot_message_id"] = msg.message_id
             return
 
         # choose drink → delete drink list, ask for quantity
         if data.startswith("drink:"):
-            drink_id = data.split(":", 1)[1]
-            drink = find_drink_by_id(drinks_data, drink_id)
-            if not drink:
+            summary = find_drink_summary(drinks_data, data.split(":", 1)[1])
+            if not summary:
                 await query.answer("Drink not found", show_alert=True)
                 return
+            drink_id, drink_names, drink_price = summary
+            drink_name = drink_names.get(lang) or drink_names["en"]
 
-            session["data"]["current_drink"] = drink
+            session["data"]["current_drink"] = drink_id
             session["step"] = "quantity"
 
             user_order_progress[user_id] = {
-                "name": get_drink_display_name(drink, lang),
-                "price": get_drink_price(drink),
+                "drink_id": drink_id,
+                "name": drink_name,
+                "price": drink_price,
                 "lang": lang,
             }
 
-            try:
-                await query.message.delete()
-            except Exception:
-                pass
-            try:
-                last_id = context.user_data.pop("last_bot_message_id", None)
-                if last_id:
-                    await context.bot.delete_message(query.message.chat_id, last_id)
-            except Exception:
-                pass
+            await _cleanup_prev(context, query)
 
-            prompt = tr(
-                lang,
-                f"🍻 How many of {get_drink_display_name(drink, 'en')}?",
-                f"🍻 Сколько {get_drink_display_name(drink, 'ru')}?",
-                f"🍻 Cik {get_drink_display_name(drink, 'lv')}?",
-            )
-            msg = await context.bot.send_message(chat_id=query.message.chat_id, text=prompt)
-            context.user_data["last_bot_message_id"] = msg.message_id
+            prompt = trs(lang, T_HOW_MANY).format(name=drink_name)
+            msg = await send(chat_id=chat_id, text=prompt)
+            ud["last_bot_message_id"] = msg.message_id
             return
 
         # show categories again (➕ Another drink)
         if data == "show_categories":
-            items = session["data"].get("items", [])
-            total = sum(float(it.get("sum", 0)) for it in items)
+            total = cart_total(session["data"])
             # ИСПРАВЛЕНО: 15 -> 25
             diff = 25 - total if total < 25 else 0
 
             # 💵 Заголовок с информацией о корзине
             if diff > 0:
-                balance_info = tr(
-                    lang,
-                    # ИСПРАВЛЕНО: 15.00€ -> 25.00€
-                    f"💵 Current total: {total:.2f}€\n🧾 You need {diff:.2f}€ more to reach the minimum order (25.00€).\n\n",
-                    # ИСПРАВЛЕНО: 15.00€ -> 25.00€
-                    f"💵 Сейчас в корзине: {total:.2f}€\n🧾 Осталось добавить: {diff:.2f}€, чтобы оформить заказ (мин. 25.00€).\n\n",
-                    # ИСПРАВЛЕНО: 15.00€ -> 25.00€
-                    f"💵 Pašlaik grozā: {total:.2f}€\n🧾 Jums jāpieliek vēl {diff:.2f}€, lai sasniegtu minimālo pasūtījumu (25.00€).\n\n",
-                )
+                balance_info = trs(lang, T_BALANCE_SHORT).format(total=total, diff=diff)
             else:
-                balance_info = tr(
-                    lang,
-                    f"💵 Current total: {total:.2f}€\n\n",
-                    f"💵 Сейчас в корзине: {total:.2f}€\n\n",
-                    f"💵 Pašlaik grozā: {total:.2f}€\n\n",
-                )
+                balance_info = trs(lang, T_BALANCE).format(total=total)
 
-            try:
-                await query.message.delete()
-            except Exception:
-                pass
-            try:
-                last_id = context.user_data.pop("last_bot_message_id", None)
-                if last_id:
-                    await context.bot.delete_message(query.message.chat_id, last_id)
-            except Exception:
-                pass
+            await _cleanup_prev(context, query)
 
             session["step"] = "category"
             kb = build_category_keyboard(drinks_data, lang)
-            msg = await context.bot.send_message(
-                chat_id=query.message.chat_id,
-                text=balance_info + tr(lang, "🍾 Choose a category:", "🍾 Выберите категорию:", "🍾 Izvēlieties kategoriju:"),
+            msg = await send(
+                chat_id=chat_id,
+                text=balance_info + trs(lang, T_CHOOSE_CATEGORY),
                 reply_markup=kb,
                 parse_mode=ParseMode.HTML,
             )
-            context.user_data["last_bot_message_id"] = msg.message_id
+            ud["last_bot_message_id"] = msg.message_id
             return
 
         # go to region
         if data == "cart:checkout":
-            items = session["data"].get("items", [])
-            total = sum(float(it.get("sum", 0)) for it in items)
+            total = cart_total(session["data"])
 
             # ✅ Проверка минимальной суммы
             # ИСПРАВЛЕНО: 15 -> 25
             if total < 25:
                 # ИСПРАВЛЕНО: 15 -> 25
                 diff = 25 - total  # сколько не хватает до минимальной суммы
-                warn_text = tr(
-                    lang,
-                    # ИСПРАВЛЕНО: 15.00€ -> 25.00€
-                    (
-                        f"❌ Minimum order amount is 25.00€.\n"
-                        f"💵 Your current total is {total:.2f}€.\n"
-                        f"🧾 You need to add {diff:.2f}€ more to continue.\n\n"
-                        "🛍 Please add more drinks to your cart."
-                    ),
-                    # ИСПРАВЛЕНО: 15.00€ -> 25.00€
-                    (
-                        f"❌ Минимальная сумма заказа — 25.00€.\n"
-                        f"💵 Сейчас в корзине: {total:.2f}€.\n"
-                        f"🧾 Добавьте ещё на {diff:.2f}€, чтобы оформить заказ.\n\n"
-                        "🛍 Пожалуйста, выберите дополнительные напитки."
-                    ),
-                    # ИСПРАВЛЕНО: 15.00€ -> 25.00€
-                    (
-                        f"❌ Minimālā pasūtījuma summa ir 25.00€.\n"
-                        f"💵 Jūsu pašreizējā summa: {total:.2f}€.\n"
-                        f"🧾 Jums jāpieliek vēl {diff:.2f}€, lai turpinātu.\n\n"
-                        "🛍 Lūdzu, pievienojiet vēl dzērienus grozam."
-                    ),
-                )
+                warn_text = trs(lang, T_MIN_ORDER).format(total=total, diff=diff)
 
-                button_text = tr(lang, "➕ Add drinks", "➕ Добавить напитки", "➕ Pievienot dzērienus")
+                button_text = trs(lang, T_ADD_DRINKS)
                 keyboard = InlineKeyboardMarkup([
                     [InlineKeyboardButton(button_text, callback_data="show_categories")]
                 ])
 
-                await context.bot.send_message(
-                    chat_id=query.message.chat_id,
+                await send(
+                    chat_id=chat_id,
                     text=warn_text,
                     reply_markup=keyboard,
                     parse_mode=ParseMode.HTML,
@@ -434,53 +632,35 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
                 return  # ⛔ не переходим к шагу region
 
             # ✅ Если сумма >= 25€, продолжаем оформление как обычно
-            try:
-                await query.message.delete()
-            except Exception:
-                pass
-            try:
-                last_id = context.user_data.pop("last_bot_message_id", None)
-                if last_id:
-                    await context.bot.delete_message(query.message.chat_id, last_id)
-            except Exception:
-                pass
+            await _cleanup_prev(context, query)
 
             session["step"] = "region"
-            msg = await context.bot.send_message(
-                chat_id=query.message.chat_id,
-                text=tr(lang, "📍 Enter your region:", "📍 Введите район:", "📍 Ievadiet savu rajonu:"),
+            msg = await send(
+                chat_id=chat_id,
+                text=trs(lang, T_ENTER_REGION),
             )
-            context.user_data["last_bot_message_id"] = msg.message_id
+            ud["last_bot_message_id"] = msg.message_id
             return
 
         # choose payment → delete payment message, show order summary
         if data.startswith("pay:"):
             pay = data.split(":")[1]
             pay_map = {
-                "cash": tr(lang, "Cash", "Наличные", "Skaidrā naudā"),
-                "card": tr(lang, "Card", "Карта", "Karte"),
+                "cash": trs(lang, T_PAY_CASH),
+                "card": trs(lang, T_PAY_CARD),
             }
             session["data"]["payment"] = pay_map.get(pay, "Cash")
             session["step"] = "confirm"
 
-            try:
-                await query.message.delete()
-            except Exception:
-                pass
-            try:
-                last_id = context.user_data.pop("last_bot_message_id", None)
-                if last_id:
-                    await context.bot.delete_message(query.message.chat_id, last_id)
-            except Exception:
-                pass
+            await _cleanup_prev(context, query)
 
-            msg = await context.bot.send_message(
-                chat_id=query.message.chat_id,
+            msg = await send(
+                chat_id=chat_id,
                 text=build_order_preview(session["data"], lang),
                 parse_mode=ParseMode.HTML,
                 reply_markup=build_confirm_keyboard(lang),
             )
-            context.user_data["last_bot_message_id"] = msg.message_id
+            ud["last_bot_message_id"] = msg.message_id
             return
 
         # confirm → delete summary then finalize OR cancel (5s notice)
@@ -510,28 +690,23 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
                 }
                 session["step"] = "category"
 
-                context.user_data["cart"] = []
+                ud["cart"] = []
 
             # 💬 Сообщение пользователю с кнопкой "Новый заказ"
-            button_text = tr(lang, "🛒 New order", "🛒 Новый заказ", "🛒 Jauns pasūtījums")
+            button_text = trs(lang, T_NEW_ORDER)
             keyboard = InlineKeyboardMarkup([
                 [InlineKeyboardButton(button_text, callback_data="go_start_order")]
             ])
 
-            cancel_text = tr(
-                lang,
-                "❌ Your order has been cancelled.\n\n🛍 You can start a new order anytime!",
-                "❌ Ваш заказ отменён.\n\n🛍 Вы можете оформить новый заказ в любое время!",
-                "❌ Jūsu pasūtījums tika atcelts.\n\n🛍 Jūs varat veikt jaunu pasūtījumu jebkurā laikā!",
-            )
+            cancel_text = trs(lang, T_ORDER_CANCELLED)
 
-            msg = await context.bot.send_message(
-                chat_id=query.message.chat_id,
+            msg = await send(
+                chat_id=chat_id,
                 text=cancel_text,
                 reply_markup=keyboard,
             )
 
-            context.user_data["last_bot_message_id"] = msg.message_id
+            ud["last_bot_message_id"] = msg.message_id
             user_sessions.pop(user_id, None)
             return
 
@@ -545,7 +720,7 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
             return
         if action == "deny":
             display_no = int(parts[2])
-            if user_id not in ADMIN_IDS:
+            if user_id not in ADMIN_IDS_SET:
                 await query.answer("Only admin can deny", show_alert=True)
                 return
             await _handle_deny(update, context, display_no, denied_by=user_id)
@@ -568,44 +743,84 @@ async def handle_callback_query(update: Update, context: ContextTypes.DEFAULT_TY
 
 # ====== Keyboards ======
 
+# Keyboards are pure functions of (drinks version, lang[, cat_id]); a reload bumps the version
+@lru_cache(maxsize=64)
+def _category_kb(version: int, lang: str) -> InlineKeyboardMarkup:
+    return _build_category_keyboard(_drinks_cache["data"], lang)
+
+
+@lru_cache(maxsize=256)
+def _drinks_kb(version: int, lang: str, cat_id: str) -> InlineKeyboardMarkup:
+    return _build_drinks_keyboard(_drinks_cache["data"], cat_id, lang)
+
+
 def build_category_keyboard(drinks_data, lang) -> InlineKeyboardMarkup:
+    if drinks_data is _drinks_cache["data"]:
+        return _category_kb(_drinks_cache["version"], lang)
+    return _build_category_keyboard(drinks_data, lang)
+
+
+def build_drinks_keyboard(drinks_data, cat_id, lang) -> InlineKeyboardMarkup:
+    if drinks_data is _drinks_cache["data"]:
+        return _drinks_kb(_drinks_cache["version"], lang, cat_id)
+    return _build_drinks_keyboard(drinks_data, cat_id, lang)
+
+
+# Buttons are immutable, so identical (text, callback_data) pairs share one instance across keyboards
+@lru_cache(maxsize=4096)
+def _btn(text: str, cb: str) -> InlineKeyboardButton:
+    return InlineKeyboardButton(text, callback_data=cb)
+
+
+def _build_category_keyboard(drinks_data, lang) -> InlineKeyboardMarkup:
     rows = []
     for cat_id, cat_name in iter_categories(drinks_data, lang):
-        rows.append([InlineKeyboardButton(cat_name, callback_data=f"cat:{cat_id}")])
-    return InlineKeyboardMarkup(rows or [[InlineKeyboardButton("❌ None", callback_data="none")]])
+        rows.append([_btn(cat_name, f"cat:{cat_id}")])
+    return InlineKeyboardMarkup(rows or [[_btn("❌ None", "none")]])
 
 
-def build_drinks_keyboard(drinks_data, cat_id, lang) -> InlineKeyboardMarkup:
+def _build_drinks_keyboard(drinks_data, cat_id, lang) -> InlineKeyboardMarkup:
     entries = get_drinks_in_category(drinks_data, cat_id)
     if not entries:
-        return InlineKeyboardMarkup([[InlineKeyboardButton("❌ None", callback_data="none")]])
+        return InlineKeyboardMarkup([[_btn("❌ None", "none")]])
 
     rows = []
     for d_id, d_obj in entries:
         title = get_drink_display_name(d_obj, lang)
         price = get_drink_price(d_obj)
-        rows.append([InlineKeyboardButton(f"{title} — {fmt_money(price)}", callback_data=f"drink:{d_id}")])
+        rows.append([_btn(f"{title} — {fmt_money(price)}", f"drink:{d_id}")])
 
-    rows.append([InlineKeyboardButton(tr(lang, "⬅️ Back", "⬅️ Назад", "⬅️ Atpakaļ"), callback_data="show_categories")])
+    rows.append([_btn(trs(lang, T_BACK), "show_categories")])
     return InlineKeyboardMarkup(rows)
 
 
 def build_confirm_keyboard(lang) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup([
-        [
-            InlineKeyboardButton(tr(lang, "✅ Confirm", "✅ Подтвердить", "✅ Apstiprināt"), callback_data="confirm:yes"),
-            InlineKeyboardButton(tr(lang, "❌ Cancel", "❌ Отменить", "❌ Atcelt"), callback_data="confirm:no"),
-        ]
-    ])
+    return _CONFIRM_KEYBOARDS.get(lang) or _CONFIRM_KEYBOARDS["en"]
 
 
 def build_payment_keyboard(lang) -> InlineKeyboardMarkup:
-    return InlineKeyboardMarkup([
+    return _PAYMENT_KEYBOARDS.get(lang) or _PAYMENT_KEYBOARDS["en"]
+
+
+# Per-language static keyboards, built once at import
+_CONFIRM_KEYBOARDS: Dict[str, InlineKeyboardMarkup] = {
+    lang: InlineKeyboardMarkup([
         [
-            InlineKeyboardButton(tr(lang, "💵 Cash", "💵 Наличные", "💵 Skaidrā naudā"), callback_data="pay:cash"),
-            InlineKeyboardButton(tr(lang, "💳 Card", "💳 Карта", "💳 Karte"), callback_data="pay:card"),
+            InlineKeyboardButton(trs(lang, T_CONFIRM), callback_data="confirm:yes"),
+            InlineKeyboardButton(trs(lang, T_CANCEL), callback_data="confirm:no"),
         ]
     ])
+    for lang in _TR_INDEX
+}
+_PAYMENT_KEYBOARDS: Dict[str, InlineKeyboardMarkup] = {
+    lang: InlineKeyboardMarkup([
+        [
+            InlineKeyboardButton(trs(lang, T_BTN_CASH), callback_data="pay:cash"),
+            InlineKeyboardButton(trs(lang, T_BTN_CARD), callback_data="pay:card"),
+        ]
+    ])
+    for lang in _TR_INDEX
+}
 
 
 def build_courier_group_keyboard(display_no: int) -> InlineKeyboardMarkup:
@@ -634,17 +849,17 @@ def build_order_preview(data: Dict[str, Any], lang: str) -> str:
     region = data.get("region", "-")
     payment = data.get("payment", "-")
     time = data.get("time", "-")
-    note = data.get("note") or tr(lang, "(no note)", "(без примечания)", "(bez piezīmes)")
-    total = sum(float(it.get("sum", 0)) for it in items)
+    note = data.get("note") or trs(lang, T_NO_NOTE)
+    total = cart_total(data)
     location = data.get("location")
     maps = build_maps_links(location)
 
     base = (
-        f"🧾 <b>{tr(lang, 'Order summary', 'Сводка заказа', 'Pasūtījuma kopsavilkums')}:</b>\n\n"
+        f"🧾 <b>{trs(lang, T_ORDER_SUMMARY)}:</b>\n\n"
         f"🕒 {time}\n"
         f"📍 {region}\n\n"
         f"{summary}\n\n"
-        f"💰 <b>{tr(lang, 'Total', 'Итого', 'Kopā')}:</b> {total:.2f}€\n"
+        f"💰 <b>{trs(lang, T_TOTAL)}:</b> {total:.2f}€\n"
         f"💳 {payment}\n"
         f"📝 {note}"
     )
@@ -663,9 +878,10 @@ async def finalize_order(update: Update, context: ContextTypes.DEFAULT_TYPE, ses
 
     data = session["data"]
     items = data.get("items", [])
-    total = sum(float(it.get("sum", 0)) for it in items)
+    total = cart_total(data)
 
     username_val = user.username or ""
+    day_key = get_workday_key()
     order_record = {
         "display_no": display_no,
         "delivery_no": delivery_no,
@@ -680,43 +896,54 @@ async def finalize_order(update: Update, context: ContextTypes.DEFAULT_TYPE, ses
         "items": items,
         "total_price": float(total),
         "created_at": now_local().isoformat(),
+        "workday_key": day_key,  # папка заказа; не пересчитываем из created_at при каждом сохранении
     }
 
-    day_key = get_workday_key()
     json_path = order_json_path(display_no, day_key)
-    with open(json_path, "w", encoding="utf-8") as f:
-        json.dump(order_record, f, ensure_ascii=False, indent=2)
-
-    try:
-        create_order_log(display_no, delivery_no, user_id, user.username, order_record)
-    except Exception:
-        pass
-
-    placed_text = tr(
-        lang,
-        f"✅ Your order #{delivery_no} has been successfully placed!\n\n💵 Total: {total:.2f}€\nAwaiting courier confirmation...",
-        f"✅ Ваш заказ #{delivery_no} успешно оформлен!\n\n💵 Итого: {total:.2f}€\nОжидаем подтверждение курьером...",
-        f"✅ Jūsu pasūtījums #{delivery_no} ir veiksmīgi noformēts!\n\n💵 Kopā: {total:.2f}€\nGaidām kurjera apstiprinājumu...",
-    )
-    sent = await context.bot.send_message(user_id, placed_text, parse_mode=ParseMode.HTML)
-    add_user_message(user_id, sent.message_id)
+    await asyncio.to_thread(_persist_new_order, json_path, order_record)
+    _order_day[display_no] = day_key
+    # файл выше — единственная запись заказа; индекс delivery_no и счётчик номеров обновляем без повторной записи
+    register_order_file(json_path, delivery_no, display_no)
 
+    placed_text = trs(lang, T_ORDER_PLACED).format(delivery_no=delivery_no, total=total)
     courier_text = _format_group_order_text(order_record)
     keyboard = build_courier_group_keyboard(display_no)
-    sent = await context.bot.send_message(
-        GROUP_CHAT_ID,
-        courier_text,
-        parse_mode=ParseMode.HTML,
-        reply_markup=keyboard,
-        disable_web_page_preview=True,
+
+    # Сообщение клиенту и заказ в группу курьеров отправляем параллельно
+    placed_resp, courier_resp = await asyncio.gather(
+        context.bot.send_message(user_id, placed_text, parse_mode=ParseMode.HTML),
+        context.bot.send_message(
+            GROUP_CHAT_ID,
+            courier_text,
+            parse_mode=ParseMode.HTML,
+            reply_markup=keyboard,
+            disable_web_page_preview=True,
+        ),
+        return_exceptions=True,
     )
-    _group_message_registry[sent.message_id] = (display_no, user_id)
+    if not isinstance(courier_resp, BaseException):
+        _group_message_registry[courier_resp.message_id] = (display_no, user_id)
+    if not isinstance(placed_resp, BaseException):
+        add_user_message(user_id, placed_resp.message_id)
 
-    # 🔥 После оформленного заказа очищаем корзину пользователя
+    # 🔥 После оформленного заказа очищаем корзину пользователя — заказ уже сохранён,
+    # поэтому и при ошибке отправки (ниже пробрасываем её), чтобы его нельзя было оформить дважды
     context.user_data["cart"] = []
 
     user_sessions.pop(user_id, None)
 
+    for resp in (placed_resp, courier_resp):
+        if isinstance(resp, BaseException):
+            raise resp
+
+
+def _persist_new_order(path: str, order: Dict[str, Any]):
+    """
+    Blocking persistence of a new order; run via asyncio.to_thread so the event loop keeps going.
+    This is the only write of a new order: the per-order file that stats / spy / courier handlers read.
+    """
+    atomic_write_bytes(Path(path), orjson.dumps(order), sync=True)
+
 
 def _format_group_order_text(order: Dict[str, Any]) -> str:
     items = order.get("items", [])
@@ -772,36 +999,38 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
                 raise ValueError
         except ValueError:
             await update.message.reply_text(
-                tr(lang, "❌ Please enter a valid number.", "❌ Пожалуйста, введите корректное число.", "❌ Lūdzu, ievadiet derīgu skaitli.")
+                trs(lang, T_INVALID_NUMBER)
             )
             return
 
         await clean_chat(update, context)
 
-        total_price = qty * float(drink_info["price"])
+        price = float(drink_info["price"])
+        total_price = qty * price
         name = drink_info["name"]
 
-        confirm_msg = tr(
-            lang,
-            f"✅ You added {qty} × {name} = {total_price:.2f}€ to the cart 🛒",
-            f"✅ Вы добавили {qty} × {name} = {total_price:.2f}€ в корзину 🛒",
-            f"✅ Jūs pievienojāt {qty} × {name} = {total_price:.2f}€ grozam 🛒",
-        )
+        confirm_msg = trs(lang, T_ADDED_TO_CART).format(qty=qty, name=name, total_price=total_price)
         sent = await update.effective_chat.send_message(confirm_msg)
         add_user_message(user_id, sent.message_id)
 
         cart = context.user_data.get("cart", [])
-        cart.append({"name": name, "qty": qty, "price": float(drink_info["price"]), "sum": total_price})
+        cart.append({"name": name, "qty": qty, "price": price, "sum": total_price})
         context.user_data["cart"] = cart
         if session:
-            session["data"]["items"] = cart
+            session_data = session["data"]
+            session_data["items"] = cart
+            if "total" in session_data:
+                session_data["total"] += total_price
+            else:
+                # first item since the session data was (re)created — sum whatever the cart holds
+                session_data["total"] = cart_total(session_data)
 
         buttons = [[
-            InlineKeyboardButton(tr(lang, "➕ Another drink", "➕ Ещё напиток", "➕ Vēl viens dzēriens"), callback_data="show_categories"),
-            InlineKeyboardButton(tr(lang, "✅ Checkout", "✅ Оформить заказ", "✅ Apstiprināt pasūtījumu"), callback_data="cart:checkout"),
+            InlineKeyboardButton(trs(lang, T_ANOTHER_DRINK), callback_data="show_categories"),
+            InlineKeyboardButton(trs(lang, T_CHECKOUT), callback_data="cart:checkout"),
         ]]
         msg = await update.effective_chat.send_message(
-            tr(lang, "What would you like to do next?", "Что делаем дальше?", "Ko vēlaties darīt tālāk?"),
+            trs(lang, T_WHAT_NEXT),
             reply_markup=InlineKeyboardMarkup(buttons)
         )
         context.user_data["last_bot_message_id"] = msg.message_id
@@ -814,10 +1043,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         session["step"] = "location"
 
         msg = await update.effective_chat.send_message(
-            tr(lang,
-               "📌 Send your location (📎 → Location) or type your address:",
-               "📌 Отправьте геолокацию (📎 → Геопозиция) или введите адрес:",
-               "📌 Nosūtiet atrašanās vietu (📎 → Location) vai ievadiet adresi:")
+            trs(lang, T_SEND_LOCATION)
         )
         context.user_data["last_bot_message_id"] = msg.message_id
         return
@@ -828,10 +1054,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         session["step"] = "note"
 
         msg = await update.effective_chat.send_message(
-            tr(lang,
-               "📝 Enter a note for courier (or type 'skip'):",
-               "📝 Добавьте примечание для курьера (или введите 'skip'):",
-               "📝 Pievienojiet piezīmi kurjeram (vai rakstiet 'skip'):")
+            trs(lang, T_ENTER_NOTE)
         )
         context.user_data["last_bot_message_id"] = msg.message_id
         return
@@ -845,7 +1068,7 @@ async def handle_text(update: Update, context: ContextTypes.DEFAULT_TYPE):
         session["step"] = "payment"
 
         msg = await update.effective_chat.send_message(
-            tr(lang, "💳 Choose payment method:", "💳 Выберите способ оплаты:", "💳 Izvēlieties maksājuma veidu:"),
+            trs(lang, T_CHOOSE_PAYMENT),
             reply_markup=build_payment_keyboard(lang)
         )
         context.user_data["last_bot_message_id"] = msg.message_id
@@ -864,41 +1087,99 @@ async def handle_location(update: Update, context: ContextTypes.DEFAULT_TYPE):
         session["data"]["location"] = {"latitude": loc.latitude, "longitude": loc.longitude}
         session["step"] = "note"
         msg = await update.effective_chat.send_message(
-            tr(lang,
-               "📝 Enter a note for courier (or type 'skip'):",
-               "📝 Добавьте примечание для курьера (или введите 'skip'):",
-               "📝 Pievienojiet piezīmi kurjeram (vai rakstiet 'skip'):")
+            trs(lang, T_ENTER_NOTE)
         )
         context.user_data["last_bot_message_id"] = msg.message_id
         return
 
 
 # ====== Courier/Admin actions ======
-async def _load_order(display_no: int) -> Optional[Dict[str, Any]]:
-    path = order_json_path(display_no)
-    if not os.path.exists(path):
-        day_today = get_workday_key()
+async def _load_order(display_no: int, day_key: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Order for a courier/admin action. Returns a copy of the cached dict: callers change it
+    and persist via _save_order, which puts it into the cache only after the write succeeded.
+    """
+    order = _find_order(display_no, day_key)
+    return dict(order) if order is not None else None
+
+
+def _find_order(display_no: int, day_key: Optional[str]) -> Optional[Dict[str, Any]]:
+    if day_key:
+        return _read_order_file(day_key, display_no)
+    # рабочий день, в котором заказ уже находили/писали — без перебора today/prev
+    known_day = _order_day.get(display_no)
+    if known_day:
+        order = _read_order_file(known_day, display_no)
+        if order is not None:
+            return order
+    day_today = get_workday_key()
+    order = _read_order_file(day_today, display_no)
+    if order is None:
         day_prev = get_workday_key(now_local() - timedelta(days=1))
-        for dk in (day_today, day_prev):
-            p = order_json_path(display_no, dk)
-            if os.path.exists(p):
-                with open(p, "r", encoding="utf-8") as f:
-                    return json.load(f)
+        order = _read_order_file(day_prev, display_no)
+    return order
+
+
+def _read_order_file(day_key: str, display_no: int) -> Optional[Dict[str, Any]]:
+    """Read an order via the working-set cache; re-parse only if the file's mtime changed."""
+    path = order_json_path(display_no, day_key)
+    try:
+        stamp = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
         return None
-    with open(path, "r", encoding="utf-8") as f:
-        return json.load(f)
+    key = (day_key, display_no)
+    cached = _order_cache.get(key)
+    if cached and cached[0] == stamp:
+        return cached[1]
+    try:
+        with open(path, "rb") as f:
+            # штамп берём с открытого файла: между stat и open его мог заменить os.replace
+            stamp = os.fstat(f.fileno()).st_mtime_ns
+            order = orjson.loads(f.read())
+    except FileNotFoundError:
+        return None
+    _order_cache[key] = (stamp, order)
+    _order_day[display_no] = day_key
+    return order
 
 
 def _save_order(order: Dict[str, Any]):
-    dk = get_workday_key(datetime.fromisoformat(order.get("created_at"))) if order.get("created_at") else get_workday_key()
-    path = order_json_path(order["display_no"], dk)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(order, f, ensure_ascii=False, indent=2)
+    display_no = order["display_no"]
+    # папка заказа: сохранённый workday_key; у старых заказов без него — день из рабочего набора,
+    # если там тот же заказ (display_no повторяется по дням), иначе считаем по created_at
+    dk = order.get("workday_key")
+    if not dk:
+        known = _order_day.get(display_no)
+        cached = _order_cache.get((known, display_no)) if known else None
+        if cached and cached[1].get("created_at") == order.get("created_at"):
+            dk = known
+        else:
+            dk = get_workday_key(datetime.fromisoformat(order.get("created_at"))) if order.get("created_at") else get_workday_key()
+    path = order_json_path(display_no, dk)
+    atomic_write_bytes(Path(path), orjson.dumps(order))
+    _order_cache[(dk, display_no)] = (os.stat(path).st_mtime_ns, order)
+    _order_day[display_no] = dk
+
+
+# Личное сообщение курьеру после принятия заказа (один format_map на сообщение)
+_DM_ACCEPT_TPL = (
+    "🚗 <b>You accepted the order:</b>\n\n"
+    "📦 <b>Order #{display_no}</b>\n"
+    "👤 <b>From:</b> {from_display}\n"
+    "👤 <b>Customer Order No:</b> {delivery_no}\n"
+    "⏰ <b>Time:</b> {time}\n"
+    "🍹 <b>Items:</b>\n"
+    "{items_block}\n\n"
+    "💳 <b>Payment:</b> {payment}\n"
+    "💵 <b>Total:</b> {total:.2f}€\n\n"
+    "📍 <b>Region:</b> {region}\n"
+    "📝 <b>Note:</b> {note}\n"
+    "📍 <b>Location:</b>\n"
+    "{maps}"
+)
 
 
 async def _handle_accept(update: Update, context: ContextTypes.DEFAULT_TYPE, display_no: int):
-    from bot.utils.data import load_user_ids  # используем правильную загрузку из data.py
-
     query = update.callback_query
     courier = query.from_user
     order = await _load_order(display_no)
@@ -916,30 +1197,14 @@ async def _handle_accept(update: Update, context: ContextTypes.DEFAULT_TYPE, dis
     order["courier_name"] = courier.full_name or courier.first_name
     _save_order(order)
 
-    try:
-        msg_id = query.message.message_id
-        _group_message_registry.pop(msg_id, None)
-        await context.bot.delete_message(chat_id=query.message.chat_id, message_id=msg_id)
-    except Exception:
-        pass
+    msg_id = query.message.message_id
+    _group_message_registry.pop(msg_id, None)
+    # удаление сообщения в группе не нужно для ответа курьеру — идёт параллельно
+    delete_task = asyncio.create_task(context.bot.delete_message(chat_id=query.message.chat_id, message_id=msg_id))
 
-    # --- resolve client's username via data/user_ids.json if missing in order ---
-    def _resolve_username_from_file(user_id: int) -> Optional[str]:
-        try:
-            data = load_user_ids()
-            if str(user_id) in data:
-                user_entry = data[str(user_id)]
-                if isinstance(user_entry, dict):  # {"@name": "lang"}
-                    keys = list(user_entry.keys())
-                    if keys:
-                        return keys[0].lstrip("@")
-                elif isinstance(user_entry, str) and user_entry.startswith("@"):
-                    return user_entry.lstrip("@")
-        except Exception as e:
-            print(f"[resolve_username_from_file] Error: {e}")
-        return None
-
-    username = order.get("username") or _resolve_username_from_file(order["user_id"])
+    # --- username/язык клиента из data/user_ids.json (одним поиском) ---
+    file_username, user_lang = resolve_user(order["user_id"])
+    username = order.get("username") or file_username
 
     if isinstance(username, str) and username:
         from_display = f"@{username.lstrip('@')}"
@@ -952,76 +1217,57 @@ async def _handle_accept(update: Update, context: ContextTypes.DEFAULT_TYPE, dis
     ])
     maps = build_maps_links(order.get("location"))
 
-    dm_text = (
-        "🚗 <b>You accepted the order:</b>\n\n"
-        f"📦 <b>Order #{order['display_no']}</b>\n"
-        f"👤 <b>From:</b> {from_display}\n"
-        f"👤 <b>Customer Order No:</b> {order['delivery_no']}\n"
-        f"⏰ <b>Time:</b> {order.get('time')}\n"
-        "🍹 <b>Items:</b>\n"
-        f"{items_block}\n\n"
-        f"💳 <b>Payment:</b> {order.get('payment')}\n"
-        f"💵 <b>Total:</b> {float(order.get('total_price') or 0):.2f}€\n\n"
-        f"📍 <b>Region:</b> {order.get('region') or '-'}\n"
-        f"📝 <b>Note:</b> {order.get('note') or '-'}\n"
-        f"📍 <b>Location:</b>\n"
-    )
-    if maps:
-        dm_text += f"🔗 {maps}"
-
-    kb = build_courier_private_keyboard(order["display_no"], order["user_id"])
-    sent = await context.bot.send_message(
-        courier.id,
-        dm_text,
-        parse_mode=ParseMode.HTML,
-        reply_markup=kb,
-        disable_web_page_preview=True,
-    )
-    _courier_dm_registry[(courier.id, order["display_no"])] = sent.message_id
-
-    # --- resolve customer's language using data/user_ids.json ---
-    def _resolve_lang_from_file(user_id: int) -> str:
-        try:
-            data = load_user_ids()
-            if str(user_id) in data:
-                user_entry = data[str(user_id)]
-                if isinstance(user_entry, dict):
-                    vals = list(user_entry.values())  # ["ru"], ["en"], ...
-                    if vals:
-                        return vals[0]
-        except Exception as e:
-            print(f"[resolve_lang_from_file] Error: {e}")
-        return "en"
+    dm_text = _DM_ACCEPT_TPL.format_map({
+        "display_no": order["display_no"],
+        "from_display": from_display,
+        "delivery_no": order["delivery_no"],
+        "time": order.get("time"),
+        "items_block": items_block,
+        "payment": order.get("payment"),
+        "total": float(order.get("total_price") or 0),
+        "region": order.get("region") or "-",
+        "note": order.get("note") or "-",
+        "maps": f"🔗 {maps}" if maps else "",
+    })
 
     courier_display = f"@{courier.username}" if courier.username else "courier"
-    user_lang = _resolve_lang_from_file(order["user_id"])
-
-    # --- translated message to client ---
-    text_accept = tr(
-        user_lang,
-        f"✅ Your order #{order['delivery_no']} has been accepted by {courier_display}.",
-        f"✅ Ваш заказ #{order['delivery_no']} был принят {courier_display}.",
-        f"✅ Jūsu pasūtījumu #{order['delivery_no']} pieņēma {courier_display}.",
-    )
 
-    sent = await context.bot.send_message(order["user_id"], text_accept, parse_mode=ParseMode.HTML)
-    add_user_message(order["user_id"], sent.message_id)
+    # --- translated message to client: отправляем параллельно с DM курьеру ---
+    text_accept = trs(user_lang, T_ORDER_ACCEPTED).format(delivery_no=order["delivery_no"], courier=courier_display)
+    customer_task = asyncio.create_task(
+        context.bot.send_message(order["user_id"], text_accept, parse_mode=ParseMode.HTML)
+    )
 
-    # --- SpyMode: уведомляем админов, что заказ принят курьером ---
     try:
-        spy_order = dict(order)
-        # отображаемое имя клиента, которое мы уже посчитали выше
-        spy_order["from"] = from_display
-
-        await notify_admins_order_status(
-            context=context,
-            display_no=order["display_no"],
-            order_data=spy_order,
-            action="accepted",
-            actor_text=courier_display,  # кто принял
+        kb = build_courier_private_keyboard(order["display_no"], order["user_id"])
+        sent = await context.bot.send_message(
+            courier.id,
+            dm_text,
+            parse_mode=ParseMode.HTML,
+            reply_markup=kb,
+            disable_web_page_preview=True,
         )
-    except Exception as e:
-        logging.warning(f"[spy] failed to notify admins on accept: {e}")
+        _courier_dm_registry[(courier.id, order["display_no"])] = sent.message_id
+
+        # --- SpyMode: уведомляем админов, что заказ принят курьером ---
+        try:
+            await notify_admins_order_status(
+                context=context,
+                display_no=order["display_no"],
+                order_data=order,
+                from_display=from_display,
+                action="accepted",
+                actor_text=courier_display,  # кто принял
+            )
+        except Exception as e:
+            logging.warning(f"[spy] failed to notify admins on accept: {e}")
+    finally:
+        # ошибки фоновых задач только логируем
+        _, customer_sent = await asyncio.gather(delete_task, customer_task, return_exceptions=True)
+        if isinstance(customer_sent, BaseException):
+            logging.warning(f"[accept] failed to notify customer {order['user_id']}: {customer_sent}")
+        else:
+            add_user_message(order["user_id"], customer_sent.message_id)
 
 async def _handle_deny(update: Update, context: ContextTypes.DEFAULT_TYPE, display_no: int, denied_by: int):
     query = update.callback_query
@@ -1056,35 +1302,18 @@ async def _handle_deny(update: Update, context: ContextTypes.DEFAULT_TYPE, displ
             else (admin_user.full_name or str(admin_user.id))
         )
 
-        def _resolve_username_from_file(user_id: int):
-            try:
-                data = load_user_ids()
-                if str(user_id) in data:
-                    record = data[str(user_id)]
-                    if isinstance(record, dict):
-                        k = list(record.keys())
-                        if k:
-                            return k[0].lstrip("@")
-                    elif isinstance(record, str):
-                        return record.lstrip("@")
-            except Exception as e:
-                logging.warning(f"[spy deny username lookup] {e}")
-            return None
-
-        username = order.get("username") or _resolve_username_from_file(order["user_id"])
+        username = order.get("username") or resolve_user(order["user_id"])[0]
 
         if isinstance(username, str) and username:
             from_display = f"@{username}"
         else:
             from_display = f"tg://user?id={order['user_id']}"
 
-        spy_order = dict(order)
-        spy_order["from"] = from_display
-
         await notify_admins_order_status(
             context=context,
             display_no=order["display_no"],
-            order_data=spy_order,
+            order_data=order,
+            from_display=from_display,
             action="denied",
             actor_text=admin_display,
         )
@@ -1109,8 +1338,6 @@ async def _handle_deny(update: Update, context: ContextTypes.DEFAULT_TYPE, displ
 
 
 async def _handle_delivered(update: Update, context: ContextTypes.DEFAULT_TYPE, display_no: int, customer_id: int):
-    from bot.utils.data import load_user_ids, load_user_messages, clear_user_messages
-
     query = update.callback_query
     courier = query.from_user
     order = await _load_order(display_no)
@@ -1128,98 +1355,72 @@ async def _handle_delivered(update: Update, context: ContextTypes.DEFAULT_TYPE,
     order["delivered_at"] = now_local().isoformat()
     _save_order(order)
 
-    await send_profit_report(order, context)
+    # отчёт о прибыли уходит в свой чат параллельно с уведомлением клиента (ошибки логирует сам)
+    profit_task = asyncio.create_task(send_profit_report(order, context))
 
-    # --- SpyMode: уведомляем админов, что заказ доставлен ---
     try:
-        def _resolve_username_from_file(user_id: int) -> Optional[str]:
-            try:
-                data = load_user_ids()
-                if str(user_id) in data:
-                    user_entry = data[str(user_id)]
-                    if isinstance(user_entry, dict):
-                        keys = list(user_entry.keys())
-                        if keys:
-                            return keys[0].lstrip("@")
-                    elif isinstance(user_entry, str) and user_entry.startswith("@"):
-                        return user_entry.lstrip("@")
-            except Exception as e:
-                logging.warning(f"[resolve_username_from_file in delivered] Error: {e}")
-            return None
-
-        username = order.get("username") or _resolve_username_from_file(customer_id)
-
-        if isinstance(username, str) and username:
-            from_display = f"@{username.lstrip('@')}"
-        else:
-            from_display = f"tg://user?id={customer_id}"
+        file_username, user_lang = resolve_user(customer_id)
 
-        courier_username = order.get("courier_username")
-        courier_display = (
-            f"@{courier_username}"
-            if courier_username
-            else (courier.full_name or str(courier.id))
-        )
-
-        spy_order = dict(order)
-        spy_order["from"] = from_display
+        # --- SpyMode: уведомляем админов, что заказ доставлен ---
+        try:
+            username = order.get("username") or file_username
 
-        await notify_admins_order_status(
-            context=context,
-            display_no=order["display_no"],
-            order_data=spy_order,
-            action="delivered",
-            actor_text=courier_display,
-        )
-    except Exception as e:
-        logging.warning(f"[spy] failed to notify admins on delivered: {e}")
+            if isinstance(username, str) and username:
+                from_display = f"@{username.lstrip('@')}"
+            else:
+                from_display = f"tg://user?id={customer_id}"
 
+            courier_username = order.get("courier_username")
+            courier_display = (
+                f"@{courier_username}"
+                if courier_username
+                else (courier.full_name or str(courier.id))
+            )
 
-    # --- язык клиента ---
-    def _resolve_lang_from_file(user_id: int) -> str:
-        try:
-            data = load_user_ids()
-            if str(user_id) in data:
-                user_entry = data[str(user_id)]
-                if isinstance(user_entry, dict):
-                    vals = list(user_entry.values())
-                    if vals:
-                        return vals[0]
+            await notify_admins_order_status(
+                context=context,
+                display_no=order["display_no"],
+                order_data=order,
+                from_display=from_display,
+                action="delivered",
+                actor_text=courier_display,
+            )
         except Exception as e:
-            print(f"[resolve_lang_from_file] Error: {e}")
-        return "en"
+            logging.warning(f"[spy] failed to notify admins on delivered: {e}")
 
-    user_lang = _resolve_lang_from_file(customer_id)
 
-    # --- текст доставлено ---
-    text_delivered = tr(
-        user_lang,
-        f"✅ Your order #{order['delivery_no']} has been delivered! Enjoy! 🎉",
-        f"✅ Ваш заказ #{order['delivery_no']} был доставлен! Приятного вечера! 🎉",
-        f"✅ Jūsu pasūtījums #{order['delivery_no']} ir piegādāts! Lai jauka diena! 🎉",
-    )
+        # --- текст доставлено ---
+        text_delivered = trs(user_lang, T_ORDER_DELIVERED).format(delivery_no=order["delivery_no"])
 
-    # отправляем сообщение клиенту
-    await context.bot.send_message(customer_id, text_delivered, parse_mode=ParseMode.HTML)
+        # отправляем сообщение клиенту
+        await context.bot.send_message(customer_id, text_delivered, parse_mode=ParseMode.HTML)
 
-    # --- удаляем все старые сообщения ---
-    try:
-        messages = load_user_messages()
-        to_delete = messages.get(str(customer_id), [])
-        for mid in to_delete:
-            try:
-                await context.bot.delete_message(customer_id, mid)
-            except Exception:
-                continue
-        clear_user_messages(customer_id)
-    except Exception as e:
-        print(f"[handle_delivered] cleanup error: {e}")
+        # --- удаляем все старые сообщения ---
+        try:
+            messages = load_user_messages()
+            to_delete = messages.get(str(customer_id), [])
+            # параллельно, но не больше 5 удалений одновременно в один чат
+            sem = asyncio.Semaphore(5)
+
+            async def _del(mid: int):
+                async with sem:
+                    try:
+                        await context.bot.delete_message(customer_id, mid)
+                    except Exception:
+                        pass
+
+            await asyncio.gather(*(_del(mid) for mid in to_delete))
+            clear_user_messages(customer_id)
+        except Exception as e:
+            print(f"[handle_delivered] cleanup error: {e}")
 
-    # удаляем сообщение курьера
-    try:
-        await context.bot.delete_message(chat_id=query.message.chat_id, message_id=query.message.message_id)
-    except Exception:
-        pass
+        # удаляем сообщение курьера
+        try:
+            await context.bot.delete_message(chat_id=query.message.chat_id, message_id=query.message.message_id)
+        except Exception:
+            pass
+    finally:
+        await profit_task
 
 async def _handle_cancel_by_courier(update: Update, context: ContextTypes.DEFAULT_TYPE, display_no: int, customer_id: int):
     query = update.callback_query
@@ -1254,35 +1455,18 @@ async def _handle_cancel_by_courier(update: Update, context: ContextTypes.DEFAUL
             else (courier.full_name or str(courier.id))
         )
 
-        def _resolve_username_from_file(user_id: int):
-            try:
-                data = load_user_ids()
-                if str(user_id) in data:
-                    record = data[str(user_id)]
-                    if isinstance(record, dict):
-                        k = list(record.keys())
-                        if k:
-                            return k[0].lstrip("@")
-                    elif isinstance(record, str):
-                        return record.lstrip("@")
-            except Exception as e:
-                logging.warning(f"[spy courier_cancel username lookup] {e}")
-            return None
-
-        username = order.get("username") or _resolve_username_from_file(customer_id)
+        username = order.get("username") or resolve_user(customer_id)[0]
 
         if isinstance(username, str) and username:
             from_display = f"@{username}"
         else:
             from_display = f"tg://user?id={customer_id}"
 
-        spy_order = dict(order)
-        spy_order["from"] = from_display
-
         await notify_admins_order_status(
             context=context,
             display_no=order["display_no"],
-            order_data=spy_order,
+            order_data=order,
+            from_display=from_display,
             action="courier_cancelled",
             actor_text=courier_display,
         )
@@ -1,6 +1,5 @@
 import logging
 from typing import Dict, Any, List, Tuple
-from decimal import Decimal
 
 from telegram import Update
 from telegram.constants import ParseMode
@@ -8,24 +7,40 @@ from telegram.ext import ContextTypes
 
 # Импортируем PROFIT_REPORT_CHAT_ID из config.py
 from bot.config import PROFIT_REPORT_CHAT_ID 
-# Импортируем функции для работы с себестоимостью и Decimal из stats.py
-from bot.handlers.stats import get_item_cost, money_decimal
+# Импортируем функцию себестоимости из stats.py
+from bot.handlers.stats import get_item_cost
+from bot.utils.money import to_cents
 
 logger = logging.getLogger(__name__)
 
-# --- Константы распределения прибыли ---
+# --- Константы распределения прибыли (в процентах) ---
 # Курьер: 46% от чистой прибыли
-COURIER_PERCENTAGE = Decimal("0.46") 
+COURIER_PERCENTAGE = 46
 # MR. SANYA и MR. REPA делят оставшиеся 54% пополам: 54% / 2 = 27%
-OWNER_SPLIT_PERCENTAGE = Decimal("0.27") 
+OWNER_SPLIT_PERCENTAGE = 27
 
-def calculate_order_profit_detailed(order_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Decimal]:
+# Блок одного товара в отчёте
+_ITEM_TPL = (
+    "<b>{prefix}{name}</b>\n"
+    "  ➖ Buy: {buy}€/шт.\n"
+    "  ➕ Sell: {sell}€/шт.\n"
+    "  ➡️ Total Profit: <b>{profit}€</b>\n"
+)
+
+# Все суммы считаются в целых центах (int); в евро переводим только при форматировании
+
+
+def fmt_cents(cents: int) -> str:
+    return f"{cents / 100:.2f}"
+
+
+def calculate_order_profit_detailed(order_data: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], int]:
     """
-    Рассчитывает прибыль по каждому товару и общую чистую прибыль по заказу.
-    Возвращает: (список_товаров_с_деталями, общая_чистая_прибыль)
+    Рассчитывает прибыль по каждому товару и общую чистую прибыль по заказу (в центах).
+    Возвращает: (список_товаров_с_деталями, общая_чистая_прибыль_в_центах)
     """
     detailed_items: List[Dict[str, Any]] = []
-    total_profit = Decimal("0.00")
+    total_profit = 0
 
     items = order_data.get("items", []) or []
 
@@ -35,32 +50,26 @@ def calculate_order_profit_detailed(order_data: Dict[str, Any]) -> Tuple[List[Di
             qty = int(item.get("qty", 0))
         except Exception:
             qty = 0
-            
-        # Цена продажи за одну единицу
-        sell_price_per_unit = money_decimal(item.get("price", 0)) 
-        
-        # Себестоимость за одну единицу (используем функцию из stats.py)
-        cost_per_unit = get_item_cost(name) 
-        
-        # Расчеты
-        item_revenue = sell_price_per_unit * Decimal(qty)
-        item_cost = cost_per_unit * Decimal(qty)
-        item_profit = item_revenue - item_cost
-        
+
+        # Цена продажи и себестоимость за одну единицу, в центах
+        sell_cents = to_cents(item.get("price", 0))
+        cost_cents = to_cents(get_item_cost(name))
+
+        item_profit = (sell_cents - cost_cents) * qty
         total_profit += item_profit
 
         detailed_items.append({
             "name": name,
             "qty": qty,
-            "buy": cost_per_unit, # Себестоимость за 1 шт.
-            "sell": sell_price_per_unit, # Цена продажи за 1 шт.
-            "total_profit": item_profit # Прибыль со всего количества
+            "buy": cost_cents, # Себестоимость за 1 шт. (центы)
+            "sell": sell_cents, # Цена продажи за 1 шт. (центы)
+            "total_profit": item_profit # Прибыль со всего количества (центы)
         })
 
     return detailed_items, total_profit
 
-def format_profit_message(order_data: Dict[str, Any], detailed_items: List[Dict[str, Any]], total_profit: Decimal) -> str:
-    """Форматирует сообщение для группы 'Money count'."""
+def format_profit_message(order_data: Dict[str, Any], detailed_items: List[Dict[str, Any]], total_profit: int) -> str:
+    """Форматирует сообщение для группы 'Money count'. Суммы — в центах."""
     
     courier_username = order_data.get("courier_username", "N/A")
     display_no = order_data.get("display_no", "N/A")
@@ -68,49 +77,39 @@ def format_profit_message(order_data: Dict[str, Any], detailed_items: List[Dict[
     if not courier_username.startswith('@') and courier_username != "N/A":
         courier_username = f"@{courier_username}"
 
-    # 1. Расчет распределения
-    courier_share = money_decimal(total_profit * COURIER_PERCENTAGE)
+    # 1. Расчет распределения (округление половины вверх, как раньше с ROUND_HALF_UP)
+    courier_share = (total_profit * COURIER_PERCENTAGE + 50) // 100
     remaining_profit = total_profit - courier_share
-    sanya_share = money_decimal(remaining_profit * Decimal("0.5")) # 27%
-    repa_share = money_decimal(remaining_profit * Decimal("0.5")) # 27%
-    
-    # Корректировка, чтобы сумма долей точно совпадала с total_profit
-    # Это важно из-за округления Decimal.
-    # Фактическая прибыль может быть меньше суммы округленных долей,
-    # поэтому просто убеждаемся, что все доли суммируются в total_profit.
-    if total_profit > 0:
-        # Корректируем Репу, чтобы избежать ошибок округления
-        repa_share = money_decimal(total_profit - courier_share - sanya_share)
-        
+    sanya_share = (remaining_profit + 1) // 2 # 27%
+    # Репе — остаток, чтобы сумма долей точно совпадала с total_profit
+    repa_share = total_profit - courier_share - sanya_share # 27%
     
-    # 2. Формирование сообщения
-    lines = [
-        f"💸 <b>ОТЧЕТ ПО ЗАКАЗУ #{display_no}</b> 💸",
-        "━━━━━━━━━━━━━━━",
-        f"🚚 Курьер: <b>{courier_username}</b>",
-    ]
-
-    # 3. Детализация по товарам
-    lines.append("\n<b>Детализация по товарам:</b>")
-    for item in detailed_items:
-        qty_str = f"X{item['qty']} " if item['qty'] > 1 else ""
-        lines.append(f"<b>{qty_str}{item['name']}</b>")
-        lines.append(f"  ➖ Buy: {item['buy']:.2f}€/шт.")
-        lines.append(f"  ➕ Sell: {item['sell']:.2f}€/шт.")
-        lines.append(f"  ➡️ Total Profit: <b>{item['total_profit']:.2f}€</b>")
-    
-    lines.append("━━━━━━━━━━━━━━━")
-    
-    # 4. Итоговое распределение
-    lines.extend([
-        f"📈 <b>Общая чистая прибыль:</b> <u>{total_profit:.2f}€</u>",
-        "----------------------------------",
-        f"🚴 Курьеру ({COURIER_PERCENTAGE*100:.0f}%): <b>{courier_share:.2f}€</b>",
-        f"🧑‍💻 MR. SANYA ({OWNER_SPLIT_PERCENTAGE*100:.0f}%): <b>{sanya_share:.2f}€</b>",
-        f"🧑‍💻 MR REPA ({OWNER_SPLIT_PERCENTAGE*100:.0f}%): <b>{repa_share:.2f}€</b>",
-    ])
-    
-    return "\n".join(lines)
+    # 2. Детализация по товарам — один шаблон на товар
+    items_block = "".join(
+        _ITEM_TPL.format(
+            prefix=f"X{item['qty']} " if item["qty"] > 1 else "",
+            name=item["name"],
+            buy=fmt_cents(item["buy"]),
+            sell=fmt_cents(item["sell"]),
+            profit=fmt_cents(item["total_profit"]),
+        )
+        for item in detailed_items
+    )
+
+    # 3. Итоговое сообщение одной строкой-шаблоном
+    return (
+        f"💸 <b>ОТЧЕТ ПО ЗАКАЗУ #{display_no}</b> 💸\n"
+        "━━━━━━━━━━━━━━━\n"
+        f"🚚 Курьер: <b>{courier_username}</b>\n"
+        "\n<b>Детализация по товарам:</b>\n"
+        f"{items_block}"
+        "━━━━━━━━━━━━━━━\n"
+        f"📈 <b>Общая чистая прибыль:</b> <u>{fmt_cents(total_profit)}€</u>\n"
+        "----------------------------------\n"
+        f"🚴 Курьеру ({COURIER_PERCENTAGE}%): <b>{fmt_cents(courier_share)}€</b>\n"
+        f"🧑‍💻 MR. SANYA ({OWNER_SPLIT_PERCENTAGE}%): <b>{fmt_cents(sanya_share)}€</b>\n"
+        f"🧑‍💻 MR REPA ({OWNER_SPLIT_PERCENTAGE}%): <b>{fmt_cents(repa_share)}€</b>"
+    )
 
 
 async def send_profit_report(order_data: Dict[str, Any], context: ContextTypes.DEFAULT_TYPE):
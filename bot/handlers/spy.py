@@ -1,13 +1,14 @@
-import asyncio
-import json
+import orjson
 import logging
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional, Tuple
 
-from telegram.constants import ParseMode
 from telegram.helpers import mention_html
 
 from bot.config import ADMIN_IDS, PRIMARY_ADMIN_ID
+from bot.utils.data import atomic_write_bytes
+from bot.utils.spy_queue import notifier
 
 logger = logging.getLogger(__name__)
 
@@ -17,25 +18,57 @@ DATA_DIR.mkdir(exist_ok=True)
 SPY_STATUS_FILE = DATA_DIR / "spy_status.json"
 
 
+def _build_admin_targets() -> frozenset:
+    """All admins who may receive spy updates: ADMIN_IDS + PRIMARY_ADMIN_ID, zeros dropped."""
+    # config уже отдаёт ADMIN_IDS кортежем int, а PRIMARY_ADMIN_ID — int
+    return frozenset(a for a in (*ADMIN_IDS, PRIMARY_ADMIN_ID) if a)
+
+
+# Админы не меняются во время работы бота — собираем один раз при импорте
+_ADMIN_TARGETS = _build_admin_targets()
+
+
 # ----------------------
 # File helpers for per-admin spy status
 # ----------------------
+# (mtime_ns, data) последнего прочитанного spy_status.json — файл перечитывается только при изменении
+_spy_cache: Optional[Tuple[int, dict]] = None
+# внутри этого окна (сек) кэш отдаётся без stat — подряд идущие статусы заказа делят один снимок
+_SPY_RECHECK_INTERVAL = 1.0
+_spy_checked_at = 0.0
+
+
 def _load_spy_file() -> dict:
-    """Load the per-admin spy status file. Return dict(admin_id_str -> bool)."""
+    """Load the per-admin spy status file. Return dict(admin_id_str -> bool). Shared cached dict — don't mutate."""
+    global _spy_cache, _spy_checked_at
+    now = time.monotonic()
+    if _spy_cache is not None and now - _spy_checked_at < _SPY_RECHECK_INTERVAL:
+        return _spy_cache[1]
     try:
-        if not SPY_STATUS_FILE.exists():
-            SPY_STATUS_FILE.write_text(json.dumps({}), encoding="utf-8")
+        try:
+            mtime = SPY_STATUS_FILE.stat().st_mtime_ns  # один stat: и проверка наличия, и штамп кэша
+        except FileNotFoundError:
+            SPY_STATUS_FILE.write_bytes(b"{}")
+            _spy_cache = None
             return {}
-        content = SPY_STATUS_FILE.read_text(encoding="utf-8").strip()
-        return json.loads(content) if content else {}
+        _spy_checked_at = now
+        if _spy_cache is not None and _spy_cache[0] == mtime:
+            return _spy_cache[1]
+        content = SPY_STATUS_FILE.read_bytes().strip()
+        data = orjson.loads(content) if content else {}
+        _spy_cache = (mtime, data)
+        return data
     except Exception as e:
         logger.exception(f"[spy] failed to load spy status file: {e}")
         return {}
 
 
 def _save_spy_file(data: dict) -> None:
+    global _spy_cache, _spy_checked_at
     try:
-        SPY_STATUS_FILE.write_text(json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8")
+        atomic_write_bytes(SPY_STATUS_FILE, orjson.dumps(data))
+        _spy_cache = (SPY_STATUS_FILE.stat().st_mtime_ns, data)
+        _spy_checked_at = time.monotonic()
     except Exception as e:
         logger.exception(f"[spy] failed to save spy status file: {e}")
 
@@ -52,15 +85,19 @@ def get_spy_status_for_admin(admin_id: int) -> bool:
 
 def set_spy_status_for_admin(admin_id: int, enabled: bool) -> None:
     """Set spy mode for single admin."""
-    data = _load_spy_file()
-    data[str(admin_id)] = bool(enabled)
+    current = _load_spy_file()
+    key, enabled = str(admin_id), bool(enabled)
+    if current.get(key) is enabled:
+        return  # статус не изменился — файл не переписываем
+    data = dict(current)
+    data[key] = enabled
     _save_spy_file(data)
 
 
 # ----------------------
 # Utilities for building display names / links
 # ----------------------
-def _resolve_user_display(order: dict) -> str:
+def _resolve_user_display(order: dict, from_display: Optional[str] = None) -> str:
     """
     Возвращает HTML-строку для показа клиента:
     - если есть username -> возвращаем @username (telegram автоматически делает его кликабельным);
@@ -68,31 +105,67 @@ def _resolve_user_display(order: dict) -> str:
       это даёт кликабельное имя (на которое можно нажать и перейти в профиль);
     - иначе fallback: plain 'Клиент' или значение поля 'from'.
     """
+    # If username exists -> show @username (без поиска id и mention_html)
     username = order.get("username")
-    from_field = order.get("from") or order.get("from_display") or ""
-    # try common id keys
-    user_id = order.get("user_id") or order.get("customer_id") or order.get("sender_id") or order.get("client_id")
-
-    # If username exists -> show @username
     if isinstance(username, str) and username.strip():
-        uname = username.lstrip("@").strip()
-        return f"@{uname}"
+        return f"@{username.lstrip('@').strip()}"
 
-    # If numeric id exists -> use mention_html to create clickable name
+    from_field = from_display or order.get("from") or order.get("from_display") or ""
+    label = from_field.strip() if isinstance(from_field, str) else ""
+
+    # try common id keys; if numeric id exists -> use mention_html to create clickable name
+    user_id = order.get("user_id") or order.get("customer_id") or order.get("sender_id") or order.get("client_id")
     if user_id:
-        label = (from_field.strip() if isinstance(from_field, str) and from_field.strip() else "Клиент")
+        label = label or "Клиент"
         try:
             return mention_html(int(user_id), label)
         except Exception:
             return label
 
     # Fallback: if from_field exists (plain name), return it
-    if isinstance(from_field, str) and from_field.strip():
-        return from_field.strip()
+    if label:
+        return label
 
     return "Клиент"
 
 
+# id(items) -> (items, rendered preview); заказ проходит несколько статусов с тем же списком items
+_items_preview_cache: Dict[int, Tuple[list, str]] = {}
+_ITEMS_PREVIEW_CACHE_MAX = 256
+
+
+def _render_items_preview(items: list) -> str:
+    """Render the spy items block, reusing the previous rendering for the same items list."""
+    if not items:
+        return "—"
+    cached = _items_preview_cache.get(id(items))
+    if cached and cached[0] is items:
+        return cached[1]
+
+    items_preview = "\n".join(
+        f"• {it.get('name') or it.get('title') or '?'} x{it.get('qty') or it.get('quantity') or 1}"
+        f" — {it.get('sum') or it.get('subtotal') or it.get('price') or 0}€"
+        for it in items
+    )
+
+    if len(_items_preview_cache) >= _ITEMS_PREVIEW_CACHE_MAX:
+        _items_preview_cache.clear()
+    # храним сам список, чтобы id не переиспользовался, пока запись жива
+    _items_preview_cache[id(items)] = (items, items_preview)
+    return items_preview
+
+
+# Подписи статусов для spy-уведомлений
+_ACTION_NAMES = {
+    "accepted": "✅ Заказ принят",
+    "delivered": "📦 Заказ доставлен",
+    "denied": "❌ Заказ отклонен",
+    "courier_cancelled": "🚫 Отменен курьером",
+    "pending": "⏳ В ожидании",
+    "cancelled": "❎ Отменено",
+}
+
+
 # ----------------------
 # Main notify function
 # ----------------------
@@ -102,10 +175,12 @@ async def notify_admins_order_status(
     order_data: dict,
     action: str,
     actor_text: str = "",
+    from_display: Optional[str] = None,
 ):
     """
     Отправляет обновления статуса заказа администраторам.
     Рассылает только тем админам, у которых включен персональный spy-mode.
+    from_display — готовое отображаемое имя клиента (вместо копии order_data с ключом "from").
     """
 
     try:
@@ -113,15 +188,13 @@ async def notify_admins_order_status(
         if action == "CREATED":
             return
 
-        action_names = {
-            "accepted": "✅ Заказ принят",
-            "delivered": "📦 Заказ доставлен",
-            "denied": "❌ Заказ отклонен",
-            "courier_cancelled": "🚫 Отменен курьером",
-            "pending": "⏳ В ожидании",
-            "cancelled": "❎ Отменено",
-        }
-        action_label = action_names.get(action, f"ℹ️ {action}")
+        # сначала узнаём, кому слать: если spy ни у кого не включен — текст не собираем
+        spy_status = _load_spy_file()  # один stat на уведомление, а не на каждого админа
+        active_admins = {a for a in _ADMIN_TARGETS if spy_status.get(str(a))}
+        if not active_admins:
+            return
+
+        action_label = _ACTION_NAMES.get(action) or f"ℹ️ {action}"
 
         actor_line = f"👤 <b>{actor_text}</b>\n" if actor_text else ""
 
@@ -142,20 +215,13 @@ async def notify_admins_order_status(
 
         note = order_data.get("note") or order_data.get("comment") or ""
 
-        client_display = _resolve_user_display(order_data)
+        client_display = _resolve_user_display(order_data, from_display)
 
-        # items preview
+        # items preview (рендерится один раз на заказ, см. _render_items_preview)
         items = order_data.get("items", []) or []
         if not isinstance(items, list):
             items = []
-
-        items_preview_lines = []
-        for it in items:
-            name = it.get("name") or it.get("title") or "?"
-            qty = it.get("qty") or it.get("quantity") or 1
-            line_sum = it.get("sum") or it.get("subtotal") or it.get("price") or 0
-            items_preview_lines.append(f"• {name} x{qty} — {line_sum}€")
-        items_preview = "\n".join(items_preview_lines) if items_preview_lines else "—"
+        items_preview = _render_items_preview(items)
 
         # Build message
         text = (
@@ -174,53 +240,10 @@ async def notify_admins_order_status(
 
         text += f"\n🍹 Состав заказа:\n{items_preview}"
 
-        # Collect admin targets
-        admin_targets = set()
-        if isinstance(ADMIN_IDS, (list, tuple, set)):
-            for x in ADMIN_IDS:
-                try:
-                    if x:
-                        admin_targets.add(int(x))
-                except Exception:
-                    continue
-        else:
-            # if ADMIN_IDS stored as comma-separated string in config
-            if isinstance(ADMIN_IDS, str):
-                for part in ADMIN_IDS.split(","):
-                    part = part.strip()
-                    if part:
-                        try:
-                            admin_targets.add(int(part))
-                        except Exception:
-                            pass
-
-        if PRIMARY_ADMIN_ID:
-            try:
-                admin_targets.add(int(PRIMARY_ADMIN_ID))
-            except Exception:
-                pass
-
-        # prepare tasks only for admins who have spy ON
-        tasks = []
-        for admin_id in admin_targets:
-            try:
-                if get_spy_status_for_admin(admin_id):
-                    tasks.append(
-                        context.bot.send_message(
-                            chat_id=admin_id,
-                            text=text,
-                            parse_mode=ParseMode.HTML,
-                            disable_web_page_preview=True,
-                        )
-                    )
-            except Exception as e:
-                logger.exception(f"[spy] failed to schedule send to admin {admin_id}: {e}")
-
-        if tasks:
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            for r in results:
-                if isinstance(r, Exception):
-                    logger.warning(f"[spy] send resulted in exception: {r}")
+        # ставим в очередь только админам с включенным spy; отправка — в фоне (SpyNotifier)
+        notifier.start(context.bot)
+        for admin_id in active_admins:
+            notifier.enqueue(admin_id, text)
 
     except Exception as e:
         logger.exception(f"[spy] notify_admins_order_status error: {e}")
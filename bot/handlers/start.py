@@ -9,44 +9,43 @@ from telegram.constants import ParseMode
 from telegram.ext import ContextTypes
 from bot.handlers.admin import shop_is_open
 
-import os, json
+from bot.utils.data import load_user_ids, set_user_record
 
-USER_DB_PATH = os.path.join("data", "user_ids.json")
+def _stored_lang(record) -> str:
+    if isinstance(record, dict):
+        for _, lang in record.items():
+            return lang
+    return None
+
+def _user_key(user_id: int, username: str) -> str:
+    if not username:
+        return f"@user_{user_id}"
+    username = str(username)
+    return username if username.startswith("@") else f"@{username}"
 
 def load_user_lang(user_id: int) -> str:
-    """Загружает язык пользователя из базы, если он есть"""
-    if not os.path.exists(USER_DB_PATH):
-        return None
+    """Загружает язык пользователя из базы (кэш user_ids.json), если он есть"""
     try:
-        with open(USER_DB_PATH, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        record = data.get(str(user_id))
-        if isinstance(record, dict):
-            for _, lang in record.items():
-                return lang
+        return _stored_lang(load_user_ids().get(str(user_id)))
     except Exception:
         return None
-    return None
 
 def save_user(user_id: int, username: str, lang: str):
-    """Сохраняет или обновляет пользователя в базе user_ids.json"""
-    os.makedirs(os.path.dirname(USER_DB_PATH), exist_ok=True)
-    data = {}
-    if os.path.exists(USER_DB_PATH):
-        try:
-            with open(USER_DB_PATH, "r", encoding="utf-8") as f:
-                data = json.load(f)
-        except Exception:
-            data = {}
-
-    uname = f"@{username}" if username and not str(username).startswith("@") else (username or f"user_{user_id}")
-    if uname and not uname.startswith("@"):
-        uname = f"@{uname}"
-
-    data[str(user_id)] = {uname: (lang or "en")}
-
-    with open(USER_DB_PATH, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    """Сохраняет или обновляет пользователя в user_ids.json (запись на диск — только если запись изменилась)"""
+    set_user_record(user_id, {_user_key(user_id, username): (lang or "en")})
+
+def get_or_update_user(user_id: int, username: str, fallback_lang: str = None):
+    """
+    Один проход для /start: читает сохранённый язык и обновляет запись пользователя.
+    Возвращает (stored_lang или None, changed).
+    """
+    try:
+        stored = _stored_lang(load_user_ids().get(str(user_id)))
+    except Exception:
+        stored = None
+    lang = stored or fallback_lang or "en"
+    changed = set_user_record(user_id, {_user_key(user_id, username): lang})
+    return stored, changed
 
 from bot.handlers.order import start_command
 from bot.config import CHANNEL_ID_TO_CHECK, SUBSCRIBE_LINK
@@ -97,29 +96,57 @@ TEXTS = {
     },
 }
 
+# --- Closed-shop messages ---
+_CLOSED_MSG = {
+    "ru": "🔴 Магазин сейчас закрыт. Увидимся позже!",
+    "en": "🔴 The shop is currently closed. See you later!",
+    "lv": "🔴 Veikals pašlaik ir slēgts. Tiksimies vēlāk!",
+}
+_CLOSED_MSG_LONG = {
+    "ru": "🔴 Магазин сейчас закрыт. Увидимся позже! Мы работаем с 20:00 до 8:00.",
+    "en": "🔴 The shop is currently closed. See you later! We are open from 20:00 to 08:00.",
+    "lv": "🔴 Veikals pašlaik ir slēgts. Tiksimies vēlāk! Mēs strādājam no 20:00 līdz 08:00.",
+}
+_CLOSED_DEFAULT = _CLOSED_MSG["en"]
+
 # --- i18n helper ---
+# плоские таблицы (key, lang) -> текст и key -> английский фолбэк, чтобы tr() делал один поиск
+_TR = {(key, lang): text for key, texts in TEXTS.items() for lang, text in texts.items()}
+_TR_EN = {key: texts.get("en", key) for key, texts in TEXTS.items()}
+
 def tr(key: str, lang: str) -> str:
-    return TEXTS.get(key, {}).get(lang, TEXTS.get(key, {}).get("en", key))
+    return _TR.get((key, lang)) or _TR_EN.get(key, key)
 
 # --- Helpers ---
 
+# Клавиатуры не меняются — собираем один раз при импорте (объекты PTB неизменяемы, их можно переиспользовать)
+_LANG_KB = InlineKeyboardMarkup(
+    [[InlineKeyboardButton(name, callback_data=f"lang_{code}")] for code, name in LANGS.items()]
+)
+
+_ORDER_BTN_TEXT = {
+    "lv": "🚚 Veikt pasūtījumu 🚚",
+    "en": "🚚 Make Order 🚚",
+    "ru": "🚚 Сделать заказ 🚚",
+}
+_ORDER_KB = {
+    lang: InlineKeyboardMarkup([[InlineKeyboardButton(text, callback_data="go_start_order")]])
+    for lang, text in _ORDER_BTN_TEXT.items()
+}
+
+_SUB_KB = InlineKeyboardMarkup([
+    [InlineKeyboardButton("📲 Subscribe", url=SUBSCRIBE_LINK)],
+    [InlineKeyboardButton("✅ Check Subscription", callback_data="check_subscribe")],
+])
+
 def make_lang_keyboard():
-    buttons = [[InlineKeyboardButton(name, callback_data=f"lang_{code}")] for code, name in LANGS.items()]
-    return InlineKeyboardMarkup(buttons)
+    return _LANG_KB
 
 def make_order_keyboard(lang="en"):
-    text = {
-        "lv": "🚚 Veikt pasūtījumu 🚚",
-        "en": "🚚 Make Order 🚚",
-        "ru": "🚚 Сделать заказ 🚚",
-    }.get(lang, "🚚 Make Order 🚚")
-    return InlineKeyboardMarkup([[InlineKeyboardButton(text, callback_data="go_start_order")]])
+    return _ORDER_KB.get(lang, _ORDER_KB["en"])
 
 def subscribe_keyboard():
-    return InlineKeyboardMarkup([
-        [InlineKeyboardButton("📲 Subscribe", url=SUBSCRIBE_LINK)],
-        [InlineKeyboardButton("✅ Check Subscription", callback_data="check_subscribe")],
-    ])
+    return _SUB_KB
 
 # --- Handlers ---
 
@@ -130,22 +157,17 @@ async def start_entry(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not shop_is_open():
         # Определяем язык (если не выбран — английский)
         stored_lang = context.user_data.get("lang", "en")
-        msg_text = {
-            "ru": "🔴 Магазин сейчас закрыт. Увидимся позже!",
-            "en": "🔴 The shop is currently closed. See you later!",
-            "lv": "🔴 Veikals pašlaik ir slēgts. Tiksimies vēlāk!",
-        }.get(stored_lang, "🔴 The shop is currently closed. See you later!")
+        msg_text = _CLOSED_MSG.get(stored_lang, _CLOSED_DEFAULT)
 
         await update.message.reply_text(msg_text)
         return
 
-    # загружаем язык, если он сохранён ранее
-    stored_lang = load_user_lang(user.id)
+    # загружаем язык, если он сохранён ранее, и сразу обновляем запись пользователя
+    stored_lang, _ = get_or_update_user(user.id, getattr(user, "username", None), context.user_data.get("lang"))
     if stored_lang:
         context.user_data["lang"] = stored_lang
 
     lang = context.user_data.get("lang", stored_lang or "en")
-    save_user(user.id, getattr(user, "username", None), lang)
 
     if not stored_lang:
         await update.message.reply_text("🌍 " + TEXTS["choose_lang"]["en"], reply_markup=make_lang_keyboard())
@@ -196,10 +218,6 @@ async def handle_start_callback(update: Update, context: ContextTypes.DEFAULT_TY
         # 🚫 Проверяем, открыт ли магазин
     if not shop_is_open():
         lang = context.user_data.get("lang", "en")
-        msg_text = {
-            "ru": "🔴 Магазин сейчас закрыт. Увидимся позже! Мы работаем с 20:00 до 8:00.",
-            "en": "🔴 The shop is currently closed. See you later! We are open from 20:00 to 08:00.",
-            "lv": "🔴 Veikals pašlaik ir slēgts. Tiksimies vēlāk! Mēs strādājam no 20:00 līdz 08:00.",
-        }.get(lang, "🔴 The shop is currently closed. See you later!")
+        msg_text = _CLOSED_MSG_LONG.get(lang, _CLOSED_DEFAULT)
         await context.bot.send_message(update.effective_chat.id, msg_text)
         return
@@ -1,11 +1,19 @@
-import json
+import asyncio
 import logging
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import date, datetime, timedelta
 from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
 from collections import Counter
-from typing import List, Dict, Any, Optional
+from functools import lru_cache
+from operator import itemgetter
+from typing import List, Dict, Any, Optional, Tuple
 
+import orjson
 from telegram import (
     Update,
     InlineKeyboardButton,
@@ -18,25 +26,30 @@ from telegram.ext import (
     CallbackQueryHandler,
 )
 
-from bot.config import ORDERS_DIR, ADMIN_IDS
+from bot.config import ORDERS_DIR, ADMIN_IDS_SET
+from bot.utils.money import to_cents
 
 logger = logging.getLogger(__name__)
 
 # ---------- helpers (ПЕРЕМЕЩЕНЫ ДЛЯ ИСПРАВЛЕНИЯ NameError) ----------
 
 def is_admin(user_id: int) -> bool:
-    try:
-        return int(user_id) in ADMIN_IDS
-    except Exception:
-        return False
+    # user_id из Telegram — всегда int; ADMIN_IDS_SET — frozenset из config
+    return user_id in ADMIN_IDS_SET
+
+_ZERO = Decimal("0.00")
+_CENT = Decimal("0.01")
 
 def money_decimal(value) -> Decimal:
     """Convert any numeric-like value to Decimal(2)."""
     try:
         d = Decimal(str(value))
     except (InvalidOperation, TypeError, ValueError):
-        return Decimal("0.00")
-    return d.quantize(Decimal("0.01"), rounding=ROUND_HALF_UP)
+        return _ZERO
+    return d.quantize(_CENT, rounding=ROUND_HALF_UP)
+
+def _from_cents(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
 
 def fmt_money(d: Decimal) -> str:
     return f"{d:.2f}€"
@@ -52,115 +65,210 @@ def parse_date(s: str) -> Optional[date]:
         return None
 
 
-def iter_order_files_between(start: date, end: date) -> List[Path]:
-    files: List[Path] = []
+def _day_folders_between(start: date, end: date) -> List[Path]:
+    folders: List[Path] = []
     current = start
     root = Path(ORDERS_DIR)
     while current <= end:
         folder = root / current.isoformat()
-        if folder.exists() and folder.is_dir():
-            for p in folder.glob("order_*.json"):
-                files.append(p)
+        if folder.is_dir():
+            folders.append(folder)
         current += timedelta(days=1)
+    return folders
+
+
+def _all_day_folders() -> List[Path]:
+    try:
+        with os.scandir(ORDERS_DIR) as it:
+            return sorted(Path(e.path) for e in it if e.is_dir())
+    except FileNotFoundError:
+        return []
+
+
+# folder -> (mtime_ns папки, файлы заказов): список перечитывается только когда в папке появился/пропал файл
+_DAY_LISTING_CACHE: Dict[Path, Tuple[int, Tuple[Path, ...]]] = {}
+
+
+def _list_day(folder: Path) -> Tuple[Path, ...]:
+    """order_*.json в папке дня (os.scandir вместо glob, листинг кэшируется по mtime папки)."""
+    try:
+        mtime = folder.stat().st_mtime_ns
+    except OSError:
+        return ()
+    cached = _DAY_LISTING_CACHE.get(folder)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with os.scandir(folder) as it:
+        files = tuple(
+            Path(e.path) for e in it
+            if e.name.startswith("order_") and e.name.endswith(".json")
+        )
+    _DAY_LISTING_CACHE[folder] = (mtime, files)
     return files
 
 
+def iter_order_files_between(start: date, end: date) -> List[Path]:
+    return [p for folder in _day_folders_between(start, end) for p in _list_day(folder)]
+
+
 def iter_all_order_files() -> List[Path]:
-    files: List[Path] = []
-    root = Path(ORDERS_DIR)
-    if not root.exists():
-        return files
-    for day_dir in sorted(root.iterdir()):
-        if day_dir.is_dir():
-            for p in day_dir.glob("order_*.json"):
-                files.append(p)
-    return files
+    return [p for folder in _all_day_folders() for p in _list_day(folder)]
+
+
+# path -> (mtime_ns, size, order): неизменённый файл парсится один раз
+_ORDER_CACHE: Dict[Path, Tuple[int, int, Dict[str, Any]]] = {}
+
+
+def _file_stamp(path: Path) -> Optional[Tuple[int, int]]:
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 
-def load_order_file(path: Path) -> Optional[Dict[str, Any]]:
+def load_order_file(path: Path, stamp: Optional[Tuple[int, int]] = None) -> Optional[Dict[str, Any]]:
+    """Load an order file, reusing the parsed dict while (mtime_ns, size) is unchanged. Shared dict — don't mutate."""
+    if stamp is None:
+        stamp = _file_stamp(path)
+    cached = _ORDER_CACHE.get(path)
+    if stamp is not None and cached and cached[:2] == stamp:
+        return cached[2]
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            od = orjson.loads(f.read())
     except Exception as e:
         logger.warning("Failed to load order file %s: %s", path, e)
+        _ORDER_CACHE.pop(path, None)
         return None
+    if stamp is not None:
+        _ORDER_CACHE[path] = (stamp[0], stamp[1], od)
+    return od
 
 # --- Себестоимость (ИСПРАВЛЕНО: Добавлен обратный словарь для сопоставления названий) ---
 
 DRINK_COSTS: Dict[str, Decimal] = {}
+# Та же себестоимость в центах — для агрегации
+DRINK_COSTS_CENTS: Dict[str, int] = {}
+# Плоские таблицы «любое имя (полное или короткий ключ) -> cost» — один поиск на позицию
+NAME_TO_COST: Dict[str, Decimal] = {}
+NAME_TO_COST_CENTS: Dict[str, int] = {}
 # Новый словарь: Полное название (из заказа) -> Короткий ключ (для cost)
 FULL_NAME_TO_KEY: Dict[str, str] = {} 
 
+# 1. Путь к drinks.json (надежный путь, как в прошлый раз)
+try:
+    DRINKS_JSON_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "drinks.json"
+except Exception:
+    DRINKS_JSON_PATH = Path("data/drinks.json") # Fallback
+
+
 def load_drink_costs() -> None:
     """
     Загружает себестоимость напитков ('cost') из drinks.json и строит 
     словарь FULL_NAME_TO_KEY для сопоставления названий из заказов.
+    Таблицы собираются заново и подменяются целиком — читатели в других потоках не видят полузаполненных dict.
     """
-    global DRINK_COSTS, FULL_NAME_TO_KEY
-    DRINK_COSTS.clear()
-    FULL_NAME_TO_KEY.clear()
-
-    # 1. Определяем путь к drinks.json (надежный путь, как в прошлый раз)
-    try:
-        drinks_path = Path(__file__).resolve().parent.parent.parent / "data" / "drinks.json"
-    except Exception:
-        drinks_path = Path("data/drinks.json") # Fallback
-
+    global DRINK_COSTS, DRINK_COSTS_CENTS, FULL_NAME_TO_KEY, NAME_TO_COST, NAME_TO_COST_CENTS
+    drink_costs: Dict[str, Decimal] = {}
+    drink_costs_cents: Dict[str, int] = {}
+    full_name_to_key: Dict[str, str] = {}
+    name_to_cost: Dict[str, Decimal] = {}
+    name_to_cost_cents: Dict[str, int] = {}
+
+    drinks_path = DRINKS_JSON_PATH
     if not drinks_path.exists():
         logger.error(f"🚨 drinks.json not found at expected path: {drinks_path.resolve()}. Total Cost = 0.")
-        return
+    else:
+        try:
+            with open(drinks_path, "rb") as f:
+                data = orjson.loads(f.read())
 
-    try:
-        with open(drinks_path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            
             for category in data.values():
                 for item_key, item in category.get('items', {}).items():
                     name_key = item_key # e.g. "Cēsu Premium"
-                    # !!! money_decimal теперь определен выше !!!
-                    cost = money_decimal(item.get('cost', 0)) 
-                    
+                    cost = money_decimal(item.get('cost', 0))
+
                     # 1. Сохраняем себестоимость по короткому ключу
-                    DRINK_COSTS[name_key] = cost
-                    
+                    drink_costs[name_key] = cost
+                    drink_costs_cents[name_key] = int(cost * 100)
+
                     # 2. Строим обратный словарь: полное_название -> короткий_ключ
                     # Проходим по всем языковым версиям ('ru', 'en', 'lv')
                     for lang in ['ru', 'en', 'lv']:
                         full_name = item.get(lang)
                         if full_name:
                             # Ключ в словаре - полное название из order.json
-                            FULL_NAME_TO_KEY[full_name.strip()] = name_key
-                            
-            if not DRINK_COSTS:
+                            full_name_to_key[full_name.strip()] = name_key
+
+            # полное название имеет приоритет над совпадающим коротким ключом (как в прежнем get_item_cost)
+            for name, key in (*((k, k) for k in drink_costs), *full_name_to_key.items()):
+                name = sys.intern(name)
+                name_to_cost[name] = drink_costs[key]
+                name_to_cost_cents[name] = drink_costs_cents[key]
+
+            if not drink_costs:
                  logger.warning("drinks.json loaded, but no drink costs were found. Check the 'cost' field structure.")
             else:
-                 logger.info(f"Successfully loaded {len(DRINK_COSTS)} drink costs and {len(FULL_NAME_TO_KEY)} name mappings.")
-                    
-    except Exception as e:
-        logger.error(f"🚨 Failed to load drink costs from {drinks_path}: {e}. Error: {e}")
+                 logger.info(f"Successfully loaded {len(drink_costs)} drink costs and {len(full_name_to_key)} name mappings.")
+
+        except Exception as e:
+            logger.error(f"🚨 Failed to load drink costs from {drinks_path}: {e}. Error: {e}")
+
+    DRINK_COSTS, DRINK_COSTS_CENTS, FULL_NAME_TO_KEY = drink_costs, drink_costs_cents, full_name_to_key
+    NAME_TO_COST, NAME_TO_COST_CENTS = name_to_cost, name_to_cost_cents
+
+
+# mtime_ns drinks.json, по которому загружены таблицы себестоимости (None — ещё не загружали).
+# Загрузка ленивая: не при импорте, а при первой агрегации / первом get_item_cost.
+_costs_mtime: Optional[int] = None
+_COSTS_LOCK = threading.Lock()
+
 
-# Вызываем загрузку при старте модуля
-load_drink_costs()
+def _ensure_drink_costs() -> Optional[int]:
+    """(Пере)загрузить себестоимость, если drinks.json ещё не читали или он изменился. Возвращает его mtime."""
+    global _costs_mtime
+    try:
+        mtime = DRINKS_JSON_PATH.stat().st_mtime_ns
+    except OSError:
+        mtime = -1
+    if mtime != _costs_mtime:
+        with _COSTS_LOCK:
+            if mtime != _costs_mtime:
+                load_drink_costs()
+                _costs_mtime = mtime
+    return mtime
 
 def get_item_cost(item_name: str) -> Decimal:
     """
-    Возвращает себестоимость напитка. Сначала пытается найти короткий ключ 
-    по полному имени из заказа, а затем ищет cost.
+    Возвращает себестоимость напитка по полному имени из заказа или по короткому ключу.
     """
-    # 1. Ищем короткий ключ по полному названию (из order_*.json)
-    short_key = FULL_NAME_TO_KEY.get(item_name.strip())
-    
-    # 2. Если нашли ключ, ищем cost
-    if short_key:
-        return DRINK_COSTS.get(short_key, Decimal("0.00"))
-        
-    # 3. Fallback: если имя из заказа уже является коротким ключом
-    return DRINK_COSTS.get(item_name.strip(), Decimal("0.00"))
+    if _costs_mtime is None:
+        _ensure_drink_costs()
+    cost = NAME_TO_COST.get(item_name)
+    if cost is None:
+        # имя с лишними пробелами — strip только на промахе
+        cost = NAME_TO_COST.get(item_name.strip(), _ZERO)
+    return cost
+
+
+def get_item_cost_cents(item_name: str) -> int:
+    """То же, что get_item_cost, но в центах."""
+    cost = NAME_TO_COST_CENTS.get(item_name)
+    if cost is None:
+        cost = NAME_TO_COST_CENTS.get(item_name.strip(), 0)
+    return cost
 
 
 # ---------- aggregation (логика расчета прибыли верна) ----------
 
 
+# day folder -> ((кортеж (path, stamp) файлов дня, mtime drinks.json), агрегат дня): пересчитываются только изменившиеся дни
+_DAY_AGG_CACHE: Dict[Path, Tuple[tuple, Dict[str, Any]]] = {}
+_AGG_LOCK = threading.Lock()
+_LOAD_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="stats-load")
+
+
 def aggregate_orders(paths: List[Path]) -> Dict[str, Any]:
     """
     Возвращает dict:
@@ -168,65 +276,153 @@ def aggregate_orders(paths: List[Path]) -> Dict[str, Any]:
       items_counter (name -> qty), orders_by_status (status -> count),
       couriers_counter (courier_username -> count), orders_list (raw orders)
     """
+    _ensure_drink_costs()
+    return _reduce(_load_many(tuple((p, _file_stamp(p)) for p in paths)))
+
+
+def aggregate_day(folder: Path) -> Dict[str, Any]:
+    """
+    Агрегат одной папки дня. Кэшируется по штампам её файлов (заказы рабочего дня
+    могут меняться и после полуночи, поэтому «прошлый день» сам по себе не считается неизменным).
+    Возвращает общий объект — не изменяйте его.
+    """
+    # себестоимость входит в агрегат, поэтому правка drinks.json тоже сбрасывает кэш дня
+    key = (tuple((p, _file_stamp(p)) for p in _list_day(folder)), _ensure_drink_costs())
+    # вызывается из worker-потоков (см. _aggregate_off_loop) — кэш под локом
+    with _AGG_LOCK:
+        cached = _DAY_AGG_CACHE.get(folder)
+        if cached and cached[0] == key:
+            return cached[1]
+        agg = _reduce(_load_many(key[0]))
+        _DAY_AGG_CACHE[folder] = (key, agg)
+    return agg
+
+
+def merge_aggregates(aggs: List[Dict[str, Any]]) -> Dict[str, Any]:
+    """Сложить агрегаты нескольких дней в новый dict (исходные не меняются)."""
+    gross_revenue = _ZERO
+    total_cost = _ZERO
     total_orders = 0
-    gross_revenue = Decimal("0.00")
-    total_cost = Decimal("0.00")
     items_counter: Counter = Counter()
     orders_by_status: Counter = Counter()
     couriers_counter: Counter = Counter()
     orders_list: List[Dict[str, Any]] = []
+    for agg in aggs:
+        total_orders += agg["total_orders"]
+        gross_revenue += agg["gross_revenue"]
+        total_cost += agg["total_cost"]
+        # update(), а не "+": сложение Counter выкидывает нулевые значения
+        items_counter.update(agg["items_counter"])
+        orders_by_status.update(agg["orders_by_status"])
+        couriers_counter.update(agg["couriers_counter"])
+        orders_list.extend(agg["orders_list"])
+    return {
+        "total_orders": total_orders,
+        "gross_revenue": gross_revenue,
+        "total_cost": total_cost,
+        "net_profit": gross_revenue - total_cost,
+        "items_counter": items_counter,
+        "orders_by_status": orders_by_status,
+        "couriers_counter": couriers_counter,
+        "orders_list": orders_list,
+    }
+
+
+def aggregate_range(start: date, end: date) -> Dict[str, Any]:
+    return merge_aggregates([aggregate_day(folder) for folder in _day_folders_between(start, end)])
+
+
+def aggregate_all() -> Dict[str, Any]:
+    return merge_aggregates([aggregate_day(folder) for folder in _all_day_folders()])
+
+
+async def _aggregate_off_loop(aggregate, *args) -> Dict[str, Any]:
+    """Run an aggregation in a worker thread, so stats clicks don't block the event loop."""
+    return await asyncio.to_thread(aggregate, *args)
+
+
+# Рейтинги «за всё время» (топ-напитки / курьеры) переиспользуют агрегат сессии админа в пределах TTL
+ALLTIME_AGG_TTL = 60.0
+
+
+async def _get_alltime_agg(context: ContextTypes.DEFAULT_TYPE, ttl: float = ALLTIME_AGG_TTL) -> Dict[str, Any]:
+    now = time.monotonic()
+    cached = context.user_data.get("_alltime_agg")
+    if cached and now - cached[0] < ttl:
+        return cached[1]
+    agg = await _aggregate_off_loop(aggregate_all)
+    context.user_data["_alltime_agg"] = (now, agg)
+    return agg
+
 
-    for p in paths:
-        od = load_order_file(p)
+def _load_many(stamped: tuple) -> List[Optional[Dict[str, Any]]]:
+    """Read + parse order files in parallel (чтение файлов отпускает GIL)."""
+    return list(_LOAD_POOL.map(lambda entry: load_order_file(*entry), stamped))
+
+
+@lru_cache(maxsize=1024)
+def _normalize_courier(key: str) -> str:
+    """Курьер в рейтинге: @username или числовой id как есть."""
+    return key if key.startswith('@') or key.isdigit() else f"@{key}"
+
+
+def _reduce(orders: List[Optional[Dict[str, Any]]]) -> Dict[str, Any]:
+    total_orders = 0
+    # деньги — в целых центах; в Decimal переводятся один раз при сборке результата
+    gross_revenue_cents = 0
+    total_cost_cents = 0
+    items_counter: Counter = Counter()
+    orders_by_status: Counter = Counter()
+    couriers_counter: Counter = Counter()
+    orders_list: List[Dict[str, Any]] = []
+
+    # локальные ссылки — горячий цикл по всем заказам
+    _tc = to_cents
+    _gicc = get_item_cost_cents
+
+    for od in orders:
         if not od:
             continue
         total_orders += 1
         orders_list.append(od)
 
         # status (robust)
-        raw_status = od.get("status", "")
-        status = str(raw_status).lower()
+        status = str(od.get("status", "")).lower()
         orders_by_status[status] += 1
-        
+
         # Обрабатываем выручку, себестоимость и товары ТОЛЬКО для доставленных заказов
         if status == "delivered":
-            
-            # 1. Выручка (Gross Revenue)
-            tp = money_decimal(od.get("total_price", 0))
-            if tp == Decimal("0.00"):
-                s = Decimal("0.00")
-                for it in od.get("items", []) or []:
-                    s += money_decimal(it.get("sum", 0)) # Используем "sum" из order_1.json
-                tp = s
-            gross_revenue += tp
-            
-            # 2. Себестоимость (Total Cost) и учет проданных items
-            order_cost = Decimal("0.00")
-            for it in od.get("items", []) or []:
-                # !!! Здесь name - это полное название, как "Ред Булл" !!!
-                name = it.get("name", "unknown") 
+            items = od.get("items", []) or []
+
+            # Выручка (Gross Revenue); если total_price нет — сумма "sum" по позициям (в том же проходе)
+            tp = _tc(od.get("total_price", 0))
+            need_items_sum = tp == 0
+
+            # Один проход по items: себестоимость, счётчик напитков и (при необходимости) выручка
+            order_items: Dict[str, int] = {}
+            for it in items:
+                name = it.get("name", "unknown")  # полное название, как "Ред Булл"
                 try:
-                    qty = int(it.get("qty", 0)) # Используем "qty" из order_1.json
+                    qty = int(it.get("qty", 0))
                 except Exception:
                     qty = 0
-                
-                # Учитываем item counter только для delivered (для правильного Топ-напитка)
-                items_counter[name] += qty 
-                
-                # Теперь эта функция корректно найдет себестоимость по полному имени
-                cost_per_item = get_item_cost(name) 
-                order_cost += cost_per_item * Decimal(qty)
-                
-            total_cost += order_cost
-            
+
+                order_items[name] = order_items.get(name, 0) + qty
+                total_cost_cents += _gicc(name) * qty
+                if need_items_sum:
+                    tp += _tc(it.get("sum", 0))
+
+            # Учитываем item counter только для delivered (для правильного Топ-напитка) — одним update на заказ
+            items_counter.update(order_items)
+            gross_revenue_cents += tp
+
         # couriers (executor / courier_username) считаем для delivered и accepted
         courier_key = od.get("courier_username") or od.get("executor")
-        if courier_key and status in ("accepted", "delivered"):
-            courier_username = str(courier_key)
-            if not courier_username.startswith('@') and not courier_username.isdigit():
-                courier_username = f"@{courier_username}"
-            couriers_counter[courier_username] += 1
+        if courier_key and (status == "delivered" or status == "accepted"):
+            couriers_counter[_normalize_courier(str(courier_key))] += 1
 
+    gross_revenue = _from_cents(gross_revenue_cents)
+    total_cost = _from_cents(total_cost_cents)
     return {
         "total_orders": total_orders,
         "gross_revenue": gross_revenue,
@@ -241,6 +437,13 @@ def aggregate_orders(paths: List[Path]) -> Dict[str, Any]:
 
 # ---------- formatters (без изменений) ----------
 
+_STATUS_EMOJI = {"delivered": "✅", "accepted": "📦", "pending": "⏳", "cancelled": "❌"}
+_MEDALS = ("🥇", "🥈", "🥉")
+
+
+def _medal(place: int) -> str:
+    return _MEDALS[place - 1] if place <= 3 else f"{place}."
+
 
 def build_summary_message(agg: Dict[str, Any], header: str) -> str:
     """Использует новый формат с эмодзи и акцентами."""
@@ -283,8 +486,8 @@ def build_summary_message(agg: Dict[str, Any], header: str) -> str:
         "📦 <b>Детализация по статусам:</b>",
     ]
     # Детализированный список статусов
-    for status, cnt in sorted(orders_by_status.items(), key=lambda item: item[1], reverse=True):
-        emoji = {"delivered": "✅", "accepted": "📦", "pending": "⏳", "cancelled": "❌"}.get(status, "⚪️")
+    for status, cnt in sorted(orders_by_status.items(), key=itemgetter(1), reverse=True):
+        emoji = _STATUS_EMOJI.get(status, "⚪️")
         lines.append(f"  {emoji} {status.capitalize() or 'Неизвестно'}: {cnt}")
     
     lines.append("━━━━━━━━━━━━━━━")
@@ -304,17 +507,10 @@ def build_top_drinks_message(
         lines.append("━━━━━━━━━━━━━━━")
         return "\n".join(lines)
 
-    for i, (name, qty) in enumerate(items_counter.most_common(top_n), start=1):
-        if i == 1:
-            prefix = "🥇"
-        elif i == 2:
-            prefix = "🥈"
-        elif i == 3:
-            prefix = "🥉"
-        else:
-            prefix = f"{i}."
-        
-        lines.append(f"{prefix} {name} — <b>{qty} шт.</b>")
+    lines.extend(
+        f"{_medal(i)} {name} — <b>{qty} шт.</b>"
+        for i, (name, qty) in enumerate(items_counter.most_common(top_n), start=1)
+    )
 
     lines.append("━━━━━━━━━━━━━━━")
     return "\n".join(lines)
@@ -331,21 +527,10 @@ def build_couriers_message(couriers_counter: Counter, title: str) -> str:
         lines.append("━━━━━━━━━━━━━━━")
         return "\n".join(lines)
 
-    sorted_couriers = couriers_counter.most_common()
-
-    for i, (username, count) in enumerate(sorted_couriers, start=1):
-        if i == 1:
-            prefix = "🥇"
-        elif i == 2:
-            prefix = "🥈"
-        elif i == 3:
-            prefix = "🥉"
-        else:
-            prefix = f"{i}."
-
-        display_name = username
-        
-        lines.append(f"{prefix} {display_name}: <b>{count}</b> заказов")
+    lines.extend(
+        f"{_medal(i)} {username}: <b>{count}</b> заказов"
+        for i, (username, count) in enumerate(couriers_counter.most_common(), start=1)
+    )
 
     lines.append("━━━━━━━━━━━━━━━")
     return "\n".join(lines)
@@ -428,8 +613,7 @@ async def stats_daily_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     today = date.today()
-    paths = iter_order_files_between(today, today)
-    agg = aggregate_orders(paths)
+    agg = await _aggregate_off_loop(aggregate_range, today, today)
     msg = build_summary_message(
         agg, f"({today.isoformat()})"
     )
@@ -445,8 +629,7 @@ async def stats_weekly_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
 
     today = date.today()
     start = today - timedelta(days=6)
-    paths = iter_order_files_between(start, today)
-    agg = aggregate_orders(paths)
+    agg = await _aggregate_off_loop(aggregate_range, start, today)
     msg = build_summary_message(
         agg, f"({start.isoformat()} — {today.isoformat()})"
     )
@@ -459,8 +642,7 @@ async def stats_alltime_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
     if not is_admin(user.id):
         return
 
-    paths = iter_all_order_files()
-    agg = aggregate_orders(paths)
+    agg = await _get_alltime_agg(context, ttl=0)  # сводка всегда свежая, заодно обновляет агрегат сессии
     msg = build_summary_message(agg, "(ЗА ВСЁ ВРЕМЯ)")
     await _send_stats_message(q.message.chat_id, msg, context)
 
@@ -473,8 +655,7 @@ async def stats_top_drinks_cb(update: Update, context: ContextTypes.DEFAULT_TYPE
         return
 
     # Используем все файлы, как это было задумано для "Топ-напитков (за всё время)"
-    paths = iter_all_order_files()
-    agg = aggregate_orders(paths)
+    agg = await _get_alltime_agg(context)
     msg = build_top_drinks_message(
         agg["items_counter"], "ТОП-НАПИТКИ (за всё время)", top_n=15
     )
@@ -489,8 +670,7 @@ async def stats_couriers_cb(update: Update, context: ContextTypes.DEFAULT_TYPE):
         return
 
     # Используем все файлы, как это было задумано для "Рейтинг курьеров (по кол-ву доставленных/принятых заказов)"
-    paths = iter_all_order_files()
-    agg = aggregate_orders(paths)
+    agg = await _get_alltime_agg(context)
     msg = build_couriers_message(
         agg["couriers_counter"],
         "РЕЙТИНГ КУРЬЕРОВ (по кол-ву доставленных/принятых заказов)",
@@ -1,5 +1,8 @@
 import asyncio
 import logging
+import signal
+import sys
+from typing import Dict, Tuple
 from telegram import BotCommand, Update
 from telegram.ext import (
     ApplicationBuilder,
@@ -10,11 +13,12 @@ from telegram.ext import (
     filters,
 )
 from telegram.constants import ParseMode
-from bot.utils.data import load_user_ids, load_drinks, add_user_message
+from bot.utils.data import load_user_ids, load_drinks, add_user_message, flush_user_ids, flush_courier_data, flush_user_messages, DRINKS_PATH
 
 # --- Project config ---
 from bot.config import BOT_TOKEN
-from bot.handlers.order import handle_text, handle_location
+from bot.handlers.order import handle_text, handle_location, sweep_expired_entries, cancel_pending_deletes, REGISTRY_SWEEP_INTERVAL_SECONDS
+from bot.utils.spy_queue import notifier as spy_notifier
 from bot.handlers.start import (
     start_entry,
     handle_lang_choice,
@@ -55,6 +59,50 @@ logging.getLogger("telegram.ext._application").setLevel(logging.ERROR)
 # ==========================================================
 # 🧾 /menu — красиво оформленное меню из drinks.json с учётом языка
 # ==========================================================
+# Эмодзи категорий
+MENU_CATEGORY_EMOJIS = {
+    "Beer": "🍺",
+    "Vodka": "🥶",
+    "Whiskey": "🥃",
+    "Champagne": "🍾",
+    "Energy Drinks": "⚡",
+    "Wine": "🍷",
+    "Tequila": "🌵",
+    "Rum": "🏴‍☠️",
+    "Gin": "🍸",
+    "Liqueur": "🍹",
+}
+
+# Компактный заголовок
+MENU_HEADERS = {
+    "ru": "🍸 <b>Меню напитков</b>\n━━━━━━━━━━\n",
+    "en": "🍸 <b>Drinks Menu</b>\n━━━━━━━━━━\n",
+    "lv": "🍸 <b>Dzērienu ēdienkarte</b>\n━━━━━━━━━━\n",
+}
+
+# lang -> (mtime_ns drinks.json, готовый текст меню): меню пересобирается только после правки drinks.json
+_MENU_CACHE: Dict[str, Tuple[int, str]] = {}
+
+
+def _render_menu(drinks_data: dict, user_lang: str) -> str:
+    lines = [MENU_HEADERS.get(user_lang, MENU_HEADERS["ru"])]
+
+    for cat_key, cat_info in drinks_data.items():
+        cat_name = cat_info["name"].get(user_lang, cat_info["name"].get("en", cat_key))
+        emoji = MENU_CATEGORY_EMOJIS.get(cat_name, "🍹")
+        lines.append(f"<b>{emoji} {cat_name}</b>")
+        lines.append("──────────")
+
+        for item_key, item in cat_info["items"].items():
+            name = item.get(user_lang, item.get("en", item_key))
+            price = item.get("price", 0)
+            lines.append(f"▫️ <b>{name}</b> — {price:.2f}€")
+
+        lines.append("")
+
+    return "\n".join(lines)
+
+
 async def menu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
     """Отправляет пользователю красиво оформленное меню напитков из drinks.json"""
     user_id = update.effective_user.id
@@ -75,55 +123,26 @@ async def menu_command(update: Update, context: ContextTypes.DEFAULT_TYPE):
         print(f"[menu_command] language detect error: {e}")
         user_lang = "ru"
 
-    # 2) Загружаем drinks.json
+    # 2) Готовое меню из кэша или сборка из drinks.json
     try:
-        drinks_data = load_drinks()
-    except Exception as e:
-        print(f"[menu_command] load_drinks error: {e}")
-        await update.message.reply_text("❌ Меню временно недоступно.")
-        return
-
-    # 3) Эмодзи категорий
-    category_emojis = {
-        "Beer": "🍺",
-        "Vodka": "🥶",
-        "Whiskey": "🥃",
-        "Champagne": "🍾",
-        "Energy Drinks": "⚡",
-        "Wine": "🍷",
-        "Tequila": "🌵",
-        "Rum": "🏴‍☠️",
-        "Gin": "🍸",
-        "Liqueur": "🍹",
-    }
-
-    # 4) Компактный заголовок
-    headers = {
-        "ru": "🍸 <b>Меню напитков</b>\n━━━━━━━━━━\n",
-        "en": "🍸 <b>Drinks Menu</b>\n━━━━━━━━━━\n",
-        "lv": "🍸 <b>Dzērienu ēdienkarte</b>\n━━━━━━━━━━\n",
-    }
-    header = headers.get(user_lang, headers["ru"])
-
-    lines = [header]
-
-    # 5) Формирование списка
-    for cat_key, cat_info in drinks_data.items():
-        cat_name = cat_info["name"].get(user_lang, cat_info["name"].get("en", cat_key))
-        emoji = category_emojis.get(cat_name, "🍹")
-        lines.append(f"<b>{emoji} {cat_name}</b>")
-        lines.append("──────────")
-
-        for item_key, item in cat_info["items"].items():
-            name = item.get(user_lang, item.get("en", item_key))
-            price = item.get("price", 0)
-            lines.append(f"▫️ <b>{name}</b> — {price:.2f}€")
-
-        lines.append("")
-
-    text = "\n".join(lines)
-
-    # 6) Отправляем и запоминаем для последующей очистки
+        mtime = DRINKS_PATH.stat().st_mtime_ns
+    except OSError:
+        mtime = None
+    cached = _MENU_CACHE.get(user_lang)
+    if cached and mtime is not None and cached[0] == mtime:
+        text = cached[1]
+    else:
+        try:
+            drinks_data = load_drinks()
+        except Exception as e:
+            print(f"[menu_command] load_drinks error: {e}")
+            await update.message.reply_text("❌ Меню временно недоступно.")
+            return
+        text = _render_menu(drinks_data, user_lang)
+        if mtime is not None:
+            _MENU_CACHE[user_lang] = (mtime, text)
+
+    # 3) Отправляем и запоминаем для последующей очистки
     sent = await update.message.reply_text(text, parse_mode=ParseMode.HTML)
     try:
         add_user_message(user_id, sent.message_id)
@@ -174,11 +193,28 @@ def register_handlers(application):
     # ⚠️ 6-й: Общий CallbackHandler для логики заказов
     application.add_handler(CallbackQueryHandler(handle_callback_query))
 
+async def flush_pending_writes(application):
+    """post_shutdown: дописываем на диск всё, что ждёт отложенной записи."""
+    flush_user_ids()  # несохранённые изменения user_ids.json
+    flush_courier_data()  # отложенное сохранение данных курьеров
+    flush_user_messages()  # id сообщений клиентов, ещё не записанные в user_messages.jsonl
+
+
+def _install_stop_signals(stop: asyncio.Event):
+    """SIGINT / SIGTERM (Ctrl+C, systemd / docker stop) -> штатная остановка через stop."""
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: Ctrl+C придёт KeyboardInterrupt'ом (см. __main__)
+
+
 # --- Main bot routine ---
 async def main():
     logging.info("🚀 Starting Delivery Bot...")
 
-    application = ApplicationBuilder().token(BOT_TOKEN).build()
+    application = ApplicationBuilder().token(BOT_TOKEN).post_shutdown(flush_pending_writes).build()
     register_handlers(application)
     await set_bot_commands(application)
 
@@ -186,10 +222,27 @@ async def main():
     await application.initialize()
     await application.start()
     await application.updater.start_polling()
-    await asyncio.Event().wait()
+    # периодически чистим просроченные сессии и реестры сообщений заказов;
+    # job_queue останавливается вместе с application.stop()
+    application.job_queue.run_repeating(
+        sweep_expired_entries, interval=REGISTRY_SWEEP_INTERVAL_SECONDS, first=REGISTRY_SWEEP_INTERVAL_SECONDS
+    )
+    # очередь spy-уведомлений админам (склейка + лимит 30 msg/s)
+    spy_notifier.start(application.bot)
+
+    stop = asyncio.Event()
+    _install_stop_signals(stop)
+    try:
+        await stop.wait()
+    finally:
+        await cancel_pending_deletes()
+        await spy_notifier.stop()
+        await application.updater.stop()
+        await application.stop()
+        await application.shutdown()  # -> post_shutdown: flush_pending_writes
+        print("\n🛑 Bot stopped.")
 
 
-import sys
 if sys.platform.startswith("win"):
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
@@ -199,10 +252,12 @@ if __name__ == "__main__":
 
     loop = asyncio.new_event_loop()
     asyncio.set_event_loop(loop)
-    loop.create_task(main())
+    main_task = loop.create_task(main())
 
     try:
         print("🚀 Bot is running... (press Ctrl+C to stop)")
-        loop.run_forever()
+        loop.run_until_complete(main_task)
     except KeyboardInterrupt:
-        print("\n🛑 Bot stopped manually.")
+        # нет обработчиков сигналов (Windows): отмена main() запускает тот же finally
+        main_task.cancel()
+        loop.run_until_complete(asyncio.gather(main_task, return_exceptions=True))
@@ -1,10 +1,30 @@
-from bot.utils.data import save_courier_data, get_today_key
+from bot.utils.data import schedule_courier_data_save, get_today_key
 
-def ensure_courier_initialized(courier_data, courier_id, courier_username="Unknown", courier_full_name="Unknown"):
-    if courier_id not in courier_data:
-        courier_data[courier_id] = {}
+# Поля новой записи курьера; вложенные dict копируются для каждого курьера
+_COURIER_TEMPLATE = {
+    "username": "Unknown",
+    "full_name": "Unknown",
+    "accepted_orders": {},
+    "delivered_orders": {},
+    "brokoli_delivered": {},
+    "cancelled_orders": {},
+    "cancelled_customer_order_numbers": {},
+}
+
+
+def _new_courier_record():
+    return {k: (v.copy() if isinstance(v, dict) else v) for k, v in _COURIER_TEMPLATE.items()}
 
-    courier = courier_data[courier_id]
+
+def ensure_courier_initialized(courier_data, courier_id, courier_username="Unknown", courier_full_name="Unknown"):
+    courier = courier_data.get(courier_id)
+    if courier is None:
+        courier = courier_data[courier_id] = _new_courier_record()
+    else:
+        # старые записи могут быть без части полей — дополняем только недостающие
+        for key in _COURIER_TEMPLATE.keys() - courier.keys():
+            value = _COURIER_TEMPLATE[key]
+            courier[key] = value.copy() if isinstance(value, dict) else value
 
     # Обновляем имя и юзернейм только если они переданы
     if courier_username:
@@ -12,14 +32,6 @@ def ensure_courier_initialized(courier_data, courier_id, courier_username="Unkno
     if courier_full_name:
         courier["full_name"] = courier_full_name
 
-    courier.setdefault("username", "Unknown")
-    courier.setdefault("full_name", "Unknown")
-    courier.setdefault("accepted_orders", {})
-    courier.setdefault("delivered_orders", {})
-    courier.setdefault("brokoli_delivered", {})
-    courier.setdefault("cancelled_orders", {})
-    courier.setdefault("cancelled_customer_order_numbers", {})
-
     return courier
 
 
@@ -32,7 +44,7 @@ def update_courier_accepted_orders(courier_data, courier_id, courier_username, c
 
     courier["brokoli_delivered"].setdefault(today_key, 0)
 
-    save_courier_data(courier_data)
+    schedule_courier_data_save(courier_data)
 
 
 def update_courier_delivered_orders(courier_data, courier_id, courier_username, courier_full_name, quantity=0, loyalty_bonus=0):
@@ -48,7 +60,7 @@ def update_courier_delivered_orders(courier_data, courier_id, courier_username,
     if courier["accepted_orders"].get(today_key, 0) > 0:
         courier["accepted_orders"][today_key] -= 1
 
-    save_courier_data(courier_data)
+    schedule_courier_data_save(courier_data)
 
 
 def update_courier_cancelled_orders(courier_data, courier_id, courier_username, courier_full_name, customer_order_no):
@@ -64,4 +76,4 @@ def update_courier_cancelled_orders(courier_data, courier_id, courier_username,
 
     courier["brokoli_delivered"].setdefault(today_key, 0)
 
-    save_courier_data(courier_data)
+    schedule_courier_data_save(courier_data)
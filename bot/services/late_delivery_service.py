@@ -1,59 +1,94 @@
 import asyncio
 from datetime import datetime
+import orjson
 from pathlib import Path
+from apscheduler.jobstores.base import JobLookupError
 from bot.config import LATE_DELIVERY_CHECK_INTERVAL_MINUTES, PRIMARY_ADMIN_ID, ORDERS_DIR
 from bot.utils.logging import log_exception
 
+# слот шаблона -> ключ в заказе
+_FIELDS = (
+    ("order_id", "order_id"),
+    ("client", "from"),
+    ("courier", "courier_full_name"),
+    ("time_window", "time"),
+    ("quantity", "quantity"),
+    ("payment", "payment"),
+    ("region", "region"),
+    ("note", "note"),
+    ("status", "status"),
+)
+
+_TEMPLATE = (
+    "🚨 <b>Late Delivery:</b>\n"
+    "Order <b>#{order_id}</b> is <b>{mins_late} mins</b> late by plug {courier}!\n\n"
+    "📦 Order #{order_id} (Client: {client})\n"
+    "👤 Accepted by: {courier}\n"
+    "⏰ Time: {time_window}\n"
+    "🥦 Quantity: {quantity}\n"
+    "💳 Payment: {payment}\n"
+    "📍 Region: {region}\n"
+    "📝 Note: {note}\n"
+    "⏳ Order Status: {status}\n\n"
+    "📍 Location:\n"
+    "🔗 {location_links}"
+)
+
 class LateDeliveryNotifier:
     def __init__(self, bot, scheduler):
         self.bot = bot
         self.scheduler = scheduler
-        self.jobs = {}  # order_id: job
+        self._cache = {}  # job_id: (mtime_ns, order) — файл перечитывается только если изменился
+        self._run_counts = {}  # job_id: сколько раз задача уже сработала
 
     def schedule_late_check(self, order_number, today_key):
         job_id = f"late_delivery_{today_key}_{order_number}"
-        if job_id in self.jobs:
-            self.cancel_job(order_number, today_key)
-        self.jobs[job_id] = self.scheduler.add_job(
+        self._cache.pop(job_id, None)
+        self._run_counts.pop(job_id, None)
+        # задачи живут только в планировщике: replace_existing заменяет прежнюю с тем же id
+        self.scheduler.add_job(
             self.late_check_job,
             "interval",
             minutes=LATE_DELIVERY_CHECK_INTERVAL_MINUTES,
-            args=[order_number, today_key, 1],
+            args=[order_number, today_key],
             id=job_id,
             replace_existing=True
         )
 
     def cancel_job(self, order_number, today_key):
         job_id = f"late_delivery_{today_key}_{order_number}"
-        if job_id in self.jobs:
+        self._cache.pop(job_id, None)
+        self._run_counts.pop(job_id, None)
+        try:
             self.scheduler.remove_job(job_id)
-            del self.jobs[job_id]
+        except JobLookupError:
+            pass
 
-    async def late_check_job(self, order_number, today_key, run_count):
+    async def late_check_job(self, order_number, today_key):
         try:
+            job_id = f"late_delivery_{today_key}_{order_number}"
             order_path = ORDERS_DIR / today_key / f"order_{order_number}.json"
-            if not order_path.exists():
+            try:
+                mtime = order_path.stat().st_mtime_ns
+            except FileNotFoundError:
                 self.cancel_job(order_number, today_key)
                 return
-            import json
-            with open(order_path, "r", encoding="utf-8") as f:
-                order = json.load(f)
+            cached = self._cache.get(job_id)
+            if cached and cached[0] == mtime:
+                order = cached[1]
+            else:
+                # чтение — в worker-потоке, чтобы тик планировщика не блокировал event loop
+                order = orjson.loads(await asyncio.to_thread(order_path.read_bytes))
+                self._cache[job_id] = (mtime, order)
             status = order.get("status", "").lower()
             if status in ("delivered", "cancelled", "denied"):
                 self.cancel_job(order_number, today_key)
                 return
+            # задача остаётся на своём интервале, счётчик срабатываний — в памяти
+            run_count = self._run_counts.get(job_id, 0) + 1
+            self._run_counts[job_id] = run_count
             mins_late = LATE_DELIVERY_CHECK_INTERVAL_MINUTES * run_count
             await self.notify_admin(order, mins_late)
-            # Reschedule with incremented run_count
-            job_id = f"late_delivery_{today_key}_{order_number}"
-            self.scheduler.add_job(
-                self.late_check_job,
-                "interval",
-                minutes=LATE_DELIVERY_CHECK_INTERVAL_MINUTES,
-                args=[order_number, today_key, run_count + 1],
-                id=job_id,
-                replace_existing=True
-            )
         except Exception as e:
             log_exception(e)
             self.cancel_job(order_number, today_key)
@@ -66,23 +101,15 @@ class LateDeliveryNotifier:
             log_exception(e)
 
     def format_message(self, order, mins_late):
-        def safe(val):
-            return val if val else "N/A"
-        order_id = safe(order.get("order_id"))
-        client = safe(order.get("from"))
-        courier = safe(order.get("courier_full_name"))
-        courier_id = order.get("courier_id")
+        g = order.get
+        fields = {slot: g(key) or "N/A" for slot, key in _FIELDS}
+        fields["status"] = str(fields["status"]).upper()
+        courier_id = g("courier_id")
         # Make courier clickable if courier_id is present
         if courier_id:
-            courier = f'<a href="tg://user?id={courier_id}">{courier}</a>'
-        time_window = safe(order.get("time"))
-        quantity = safe(order.get("quantity"))
-        payment = safe(order.get("payment"))
-        region = safe(order.get("region"))
-        note = safe(order.get("note"))
-        status = safe(order.get("status")).upper()
-        loc_data = order.get("location")
-        waze = gmaps = ""
+            fields["courier"] = f'<a href="tg://user?id={courier_id}">{fields["courier"]}</a>'
+        loc_data = g("location")
+        location_links = "N/A"
         if loc_data:
             if isinstance(loc_data, dict) and "latitude" in loc_data:
                 lat, lon = loc_data["latitude"], loc_data["longitude"]
@@ -91,18 +118,5 @@ class LateDeliveryNotifier:
             else:
                 waze = f"https://waze.com/ul?q={loc_data}"
                 gmaps = f"https://www.google.com/maps/search/?api=1&query={str(loc_data).replace(' ', '+')}"
-        location_links = f"<a href='{waze}'>Waze</a> | <a href='{gmaps}'>Google Maps</a>" if waze and gmaps else "N/A"
-        return (
-            f"🚨 <b>Late Delivery:</b>\n"
-            f"Order <b>#{order_id}</b> is <b>{mins_late} mins</b> late by plug {courier}!\n\n"
-            f"📦 Order #{order_id} (Client: {client})\n"
-            f"👤 Accepted by: {courier}\n"
-            f"⏰ Time: {time_window}\n"
-            f"🥦 Quantity: {quantity}\n"
-            f"💳 Payment: {payment}\n"
-            f"📍 Region: {region}\n"
-            f"📝 Note: {note}\n"
-            f"⏳ Order Status: {status}\n\n"
-            f"📍 Location:\n"
-            f"🔗 {location_links}"
-        ) 
\ No newline at end of file
+            location_links = f"<a href='{waze}'>Waze</a> | <a href='{gmaps}'>Google Maps</a>"
+        return _TEMPLATE.format(mins_late=mins_late, location_links=location_links, **fields)
\ No newline at end of file
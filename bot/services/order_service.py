@@ -1,9 +1,17 @@
 # order_service.py
-import json
+import mmap
+import os
 import random
+import threading
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, date, timedelta
 from pathlib import Path
-from typing import Dict, Any, List, Optional, Tuple
+from typing import Dict, Any, Iterator, List, Optional, Tuple
+
+import orjson
+
+from bot.utils.data import atomic_write_bytes, ensure_dir
 
 # Base orders directory relative to project root
 ORDERS_DIR = Path("data") / "orders"
@@ -12,78 +20,130 @@ ORDERS_DIR.mkdir(parents=True, exist_ok=True)
 
 def _today_folder() -> Path:
     """Folder for today's orders (YYYY-MM-DD)."""
-    today_key = date.today().isoformat()
-    folder = ORDERS_DIR / today_key
-    folder.mkdir(parents=True, exist_ok=True)
-    return folder
+    return _ensure_folder_for_date(date.today())
 
 
 def _ensure_folder_for_date(d: date) -> Path:
     folder = ORDERS_DIR / d.isoformat()
-    folder.mkdir(parents=True, exist_ok=True)
+    ensure_dir(folder)
     return folder
 
 
-def iter_all_order_files() -> List[Path]:
-    """Return list of all order json files (sorted by date folder)."""
-    files: List[Path] = []
-    if not ORDERS_DIR.exists():
-        return files
-    for day_dir in sorted(ORDERS_DIR.iterdir()):
-        if day_dir.is_dir():
-            for f in day_dir.glob("order_*.json"):
-                files.append(f)
-    return files
+def _scan_order_files(folder: str) -> Iterator[Path]:
+    """order_*.json in one day folder (os.scandir + string checks instead of glob)."""
+    try:
+        with os.scandir(folder) as it:
+            for entry in it:
+                name = entry.name
+                if name.startswith("order_") and name.endswith(".json"):
+                    yield Path(entry.path)
+    except (FileNotFoundError, NotADirectoryError):
+        return
+
+
+# отсортированные имена дневных папок (YYYY-MM-DD), перечитываются только при изменении mtime ORDERS_DIR
+_day_dirs_cache: Tuple[int, List[str]] = (-1, [])
+
+
+def _sorted_day_dirs() -> List[str]:
+    global _day_dirs_cache
+    try:
+        mtime = ORDERS_DIR.stat().st_mtime_ns
+    except FileNotFoundError:
+        return []
+    if _day_dirs_cache[0] != mtime:
+        with os.scandir(ORDERS_DIR) as it:
+            names = sorted(entry.name for entry in it if entry.is_dir())
+        _day_dirs_cache = (mtime, names)
+    return _day_dirs_cache[1]
+
+
+def iter_all_order_files() -> Iterator[Path]:
+    """Yield all order json files (by date folder, oldest first)."""
+    for name in _sorted_day_dirs():
+        yield from _scan_order_files(os.path.join(ORDERS_DIR, name))
 
 
-def iter_order_files_between(start: date, end: date) -> List[Path]:
-    """Collect order files between start and end inclusive."""
-    files: List[Path] = []
-    cur = start
-    while cur <= end:
-        folder = ORDERS_DIR / cur.isoformat()
-        if folder.exists() and folder.is_dir():
-            for p in folder.glob("order_*.json"):
-                files.append(p)
-        cur = cur + timedelta(days=1)
-    return files
+def iter_order_files_between(start: date, end: date) -> Iterator[Path]:
+    """Yield order files between start and end inclusive."""
+    # ISO-даты сортируются как строки — бинарный поиск вместо перебора каждого дня диапазона
+    names = _sorted_day_dirs()
+    lo = bisect_left(names, start.isoformat())
+    hi = bisect_right(names, end.isoformat())
+    for name in names[lo:hi]:
+        if len(name) != 10:
+            continue  # не папка дня (например, "2026-10-14_old")
+        yield from _scan_order_files(os.path.join(ORDERS_DIR, name))
+
+
+# Файлы больше порога парсятся прямо из mmap, без промежуточной копии в bytes
+MMAP_THRESHOLD = 16 * 1024
 
 
 def _load_json_safe(path: Path) -> Optional[Dict[str, Any]]:
     try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
+        with open(path, "rb") as f:
+            if os.fstat(f.fileno()).st_size <= MMAP_THRESHOLD:
+                return orjson.loads(f.read())
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm, memoryview(mm) as view:
+                return orjson.loads(view)
     except Exception:
         return None
 
 
+# Пул для пакетного чтения архива заказов (полные проходы по всем файлам)
+_READ_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="order-read")
+
+
+def _batch_read_json(paths: List[Path]) -> List[Optional[Dict[str, Any]]]:
+    """Read + parse many order files in parallel; результат в том же порядке, что и paths."""
+    if len(paths) < 2:
+        return [_load_json_safe(p) for p in paths]
+    return list(_READ_POOL.map(_load_json_safe, paths))
+
+
+# date ISO -> последний выданный display_no за день. Инициализируется одним листингом папки
+# (номер берётся из имени order_<n>.json, без чтения JSON), дальше — счётчик в памяти.
+_display_no_counter: Dict[str, int] = {}
+_display_no_lock = threading.Lock()
+
+
+def _scan_max_display_no(d: date) -> int:
+    max_no = 0
+    for p in _scan_order_files(str(ORDERS_DIR / d.isoformat())):
+        num = p.stem[len("order_"):]
+        if num.isdigit():
+            max_no = max(max_no, int(num))
+    return max_no
+
+
 def get_next_display_no(for_date: Optional[date] = None) -> int:
     """
     Return next daily incremental display number for orders.
     If for_date is None => uses today.
+    The number is reserved right away, so concurrent orders never get the same one.
     """
-    d = for_date or date.today()
-    folder = ORDERS_DIR / d.isoformat()
-    if not folder.exists():
-        return 1
-    max_no = 0
-    for p in folder.glob("order_*.json"):
-        od = _load_json_safe(p)
-        if od and isinstance(od.get("display_no"), int):
-            if od["display_no"] > max_no:
-                max_no = od["display_no"]
-        else:
-            # fallback: try parse from filename order_<num>.json
-            try:
-                name = p.stem  # order_<num>
-                parts = name.split("_")
-                if len(parts) >= 2 and parts[1].isdigit():
-                    n = int(parts[1])
-                    if n > max_no:
-                        max_no = n
-            except Exception:
-                continue
-    return max_no + 1
+    key = (for_date or date.today()).isoformat()
+    with _display_no_lock:
+        last = _display_no_counter.get(key)
+        if last is None:
+            last = _scan_max_display_no(for_date or date.today())
+        _display_no_counter[key] = last + 1
+        return last + 1
+
+
+def _note_display_no(d: date, display_no: int) -> None:
+    """Keep the day counter ahead of numbers already written to disk."""
+    key = d.isoformat()
+    with _display_no_lock:
+        if key in _display_no_counter and display_no > _display_no_counter[key]:
+            _display_no_counter[key] = display_no
+
+
+def register_order_file(path: Path, delivery_no: str, display_no: int, for_date: Optional[date] = None) -> None:
+    """Record an order file written elsewhere in the delivery index and the day's display_no counter."""
+    _index_order(Path(path), str(delivery_no))
+    _note_display_no(for_date or date.today(), int(display_no))
 
 
 def generate_random_delivery_no() -> str:
@@ -108,7 +168,6 @@ def create_order_log(
     """
     d = for_date or date.today()
     folder = _ensure_folder_for_date(d)
-    folder.mkdir(parents=True, exist_ok=True)
 
     # Prepare canonical order object
     saved = {
@@ -127,10 +186,15 @@ def create_order_log(
         "time": order_data.get("time", "-"),
         "timestamp": order_data.get("timestamp", datetime.now().isoformat()),
     }
+    # поля, по которым _save_order находит папку заказа, не теряем
+    for key in ("username", "created_at", "workday_key"):
+        if key in order_data:
+            saved[key] = order_data[key]
 
     file_path = folder / f"order_{display_no}.json"
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(saved, f, ensure_ascii=False, indent=2)
+    atomic_write_bytes(file_path, orjson.dumps(saved, option=orjson.OPT_NON_STR_KEYS))
+    _index_order(file_path, saved["delivery_no"])
+    _note_display_no(d, saved["display_no"])
 
     return file_path, saved
 
@@ -143,13 +207,89 @@ def load_order_by_display_no(display_no: int, search_days: int = 7) -> Optional[
     for days_ago in range(search_days):
         day = date.today() - timedelta(days=days_ago)
         path = ORDERS_DIR / day.isoformat() / f"order_{display_no}.json"
-        if path.exists():
-            od = _load_json_safe(path)
-            if od:
-                return path, od
+        od = _load_json_safe(path)  # нет файла -> None, без отдельного exists()
+        if od:
+            return path, od
     return None
 
 
+# delivery_no -> пути заказов и обратная карта path -> delivery_no.
+# Индекс догоняет диск при каждом поиске: дневная папка, чей mtime изменился с прошлого
+# листинга, перечитывается — парсятся только новые и изменившиеся файлы, пропавшие убираются.
+# Так находятся и заказы, записанные в обход сервиса (handlers/order.py, восстановленные файлы).
+_delivery_index: Dict[str, List[Path]] = {}
+_path_delivery: Dict[Path, str] = {}
+# имя дневной папки -> (st_mtime_ns папки, {path: st_mtime_ns файла}) на момент последнего листинга
+_indexed_days: Dict[str, Tuple[int, Dict[Path, int]]] = {}
+
+
+def _get_delivery_index() -> Dict[str, List[Path]]:
+    for name in _sorted_day_dirs():
+        folder = ORDERS_DIR / name
+        try:
+            mtime = folder.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+        known = _indexed_days.get(name)
+        if known and known[0] == mtime:
+            continue
+        _reindex_day(name, folder, mtime, known[1] if known else {})
+    return _delivery_index
+
+
+def _reindex_day(name: str, folder: Path, mtime: int, old_files: Dict[Path, int]) -> None:
+    files: Dict[Path, int] = {}
+    for p in _scan_order_files(str(folder)):
+        try:
+            files[p] = p.stat().st_mtime_ns
+        except FileNotFoundError:
+            continue
+    for p in old_files.keys() - files.keys():
+        key = _path_delivery.get(p)
+        if key is not None:
+            _drop_from_index(key, p)
+
+    changed = [p for p, m in files.items() if old_files.get(p) != m or p not in _path_delivery]
+    complete = True
+    for p, od in zip(changed, _batch_read_json(changed)):
+        if od:
+            _index_order(p, od.get("delivery_no"))
+        else:
+            complete = False  # файл ещё пишется / битый — перечитаем папку при следующем поиске
+    _indexed_days[name] = (mtime if complete else -1, files)
+
+
+def _index_order(path: Path, delivery_no) -> None:
+    """Record path under delivery_no (and drop it from the key it was under before)."""
+    key = str(delivery_no)
+    old = _path_delivery.get(path)
+    if old == key:
+        return
+    if old is not None:
+        _drop_from_index(old, path)
+    _delivery_index.setdefault(key, []).append(path)
+    _path_delivery[path] = key
+
+
+def _drop_from_index(key: str, path: Path) -> None:
+    paths = _delivery_index.get(key)
+    if paths and path in paths:
+        paths.remove(path)
+        if not paths:
+            del _delivery_index[key]
+    if _path_delivery.get(path) == key:
+        del _path_delivery[path]
+
+
+def _indexed_paths(key: str, search_days: Optional[int]) -> List[Path]:
+    paths = _get_delivery_index().get(key, [])
+    if search_days is not None:
+        start = (date.today() - timedelta(days=search_days - 1)).isoformat()
+        end = date.today().isoformat()
+        return [p for p in paths if start <= p.parent.name <= end]
+    return list(paths)
+
+
 def load_orders_by_delivery_no(delivery_no: str, search_days: Optional[int] = None) -> List[Tuple[Path, Dict[str, Any]]]:
     """
     Find all orders with a given delivery_no.
@@ -157,27 +297,35 @@ def load_orders_by_delivery_no(delivery_no: str, search_days: Optional[int] = No
     Returns list of (path, data).
     """
     results: List[Tuple[Path, Dict[str, Any]]] = []
-    if search_days is None:
-        files = iter_all_order_files()
-    else:
-        start = date.today() - timedelta(days=search_days - 1)
-        files = iter_order_files_between(start, date.today())
+    key = str(delivery_no)
+    paths = _indexed_paths(key, search_days)
 
-    for p in files:
+    for p in paths:
         od = _load_json_safe(p)
-        if not od:
+        # файл могли удалить или переписать в обход сервиса — проверяем по содержимому
+        if not od or str(od.get("delivery_no")) != key:
+            if od:
+                _index_order(p, od.get("delivery_no"))
+            else:
+                _drop_from_index(key, p)
             continue
-        if str(od.get("delivery_no")) == str(delivery_no):
-            results.append((p, od))
+        results.append((p, od))
     return results
 
 
-def update_order_status_by_path(path: Path, new_status: str, extra_fields: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+def update_order_status_by_path(
+    path: Path,
+    new_status: str,
+    extra_fields: Optional[Dict[str, Any]] = None,
+    *,
+    current: Optional[Dict[str, Any]] = None,
+) -> Optional[Dict[str, Any]]:
     """
     Update the status (and optionally extra_fields) for the order at given path.
+    `current` — the order dict already loaded from `path` (skips re-reading the file).
     Returns updated order dict or None on failure.
     """
-    od = _load_json_safe(path)
+    od = current if current is not None else _load_json_safe(path)
     if not od:
         return None
     od["status"] = new_status
@@ -185,8 +333,9 @@ def update_order_status_by_path(path: Path, new_status: str, extra_fields: Optio
         for k, v in extra_fields.items():
             od[k] = v
     try:
-        with open(path, "w", encoding="utf-8") as f:
-            json.dump(od, f, ensure_ascii=False, indent=2)
+        atomic_write_bytes(path, orjson.dumps(od, option=orjson.OPT_NON_STR_KEYS))
+        if extra_fields and "delivery_no" in extra_fields:
+            _index_order(path, od["delivery_no"])
         return od
     except Exception:
         return None
@@ -197,17 +346,22 @@ def find_orders_for_delivery_no_shortlist(delivery_no: str, search_days: Optiona
     Helper to return a short list (display_no + date + path) for UI selection when multiple
     orders share same delivery_no. Each entry: { 'display_no': int, 'date': 'YYYY-MM-DD', 'path': str }
     """
-    found = load_orders_by_delivery_no(delivery_no, search_days=search_days)
+    # только проекция (номер + день + путь) — берём её из индекса и имени файла, JSON не читаем
+    key = str(delivery_no)
+    paths = _indexed_paths(key, search_days)
+
     shortlist: List[Dict[str, Any]] = []
-    for path, od in found:
+    for path in paths:
+        if not path.is_file():
+            _drop_from_index(key, path)
+            continue
         # path like data/orders/YYYY-MM-DD/order_<display_no>.json
         try:
-            day = path.parent.name
-            display = od.get("display_no") or int(path.stem.split("_")[1])
-        except Exception:
-            day = "unknown"
+            display = int(path.stem.split("_")[1])
+        except (IndexError, ValueError):
+            od = _load_json_safe(path) or {}
             display = od.get("display_no", -1)
-        shortlist.append({"display_no": int(display), "date": day, "path": str(path)})
+        shortlist.append({"display_no": int(display), "date": path.parent.name, "path": str(path)})
     return shortlist
 
 
@@ -225,14 +379,14 @@ def update_order_status_by_display_no(display_no: int, new_status: str, search_d
     if not found:
         return None
     path, od = found
-    return update_order_status_by_path(path, new_status, extra_fields)
+    return update_order_status_by_path(path, new_status, extra_fields, current=od)
 
 
 # Small utility to pretty-print path -> delivery_no mapping (for debugging)
 def _all_delivery_no_map() -> Dict[str, List[str]]:
     res: Dict[str, List[str]] = {}
-    for p in iter_all_order_files():
-        od = _load_json_safe(p)
+    paths = list(iter_all_order_files())
+    for p, od in zip(paths, _batch_read_json(paths)):
         if not od:
             continue
         dn = str(od.get("delivery_no", ""))
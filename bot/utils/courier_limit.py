@@ -1,6 +1,11 @@
-import json
 import os
-from bot.utils.data import load_large_order_counts
+import time
+from pathlib import Path
+from typing import Any, Dict, Tuple
+
+import orjson
+
+from bot.utils.data import atomic_write_bytes, load_large_order_counts
 from bot.config import MAX_LARGE_ORDER_COUNT_DIFFERENCE
 
 LIMIT_FILE = "data/courier_limit.json"
@@ -8,32 +13,60 @@ DEFAULT_LIMIT = 4
 INACTIVE_COURIERS_FILE = "data/inactive_couriers.json"
 BALANCE_LIMIT_FILE = "data/balance_limit.json"
 
+# path -> (mtime_ns, parsed JSON, monotonic time of the last stat): настройки перечитываются
+# только после изменения файла, а внутри _RECHECK_INTERVAL сек — даже без stat
+_cache: Dict[str, Tuple[int, Any, float]] = {}
+_RECHECK_INTERVAL = 1.0
+
+
+def _cached_json(path: str):
+    """Parsed JSON of a small settings file (None if the file doesn't exist). Shared object — don't mutate."""
+    now = time.monotonic()
+    cached = _cache.get(path)
+    if cached and now - cached[2] < _RECHECK_INTERVAL:
+        return cached[1]
+    try:
+        mtime = os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        _cache.pop(path, None)
+        return None
+    if cached and cached[0] == mtime:
+        _cache[path] = (mtime, cached[1], now)
+        return cached[1]
+    with open(path, "rb") as f:
+        data = orjson.loads(f.read())
+    _cache[path] = (mtime, data, now)
+    return data
+
+
+def _write_json(path: str, data) -> None:
+    atomic_write_bytes(Path(path), orjson.dumps(data, option=orjson.OPT_INDENT_2))
+    _cache.pop(path, None)
+
+
 def get_courier_order_limit():
-    if not os.path.exists(LIMIT_FILE):
+    data = _cached_json(LIMIT_FILE)
+    if data is None:
         return DEFAULT_LIMIT
-    with open(LIMIT_FILE, "r", encoding="utf-8") as f:
-        data = json.load(f)
     return data.get("max_active_orders_per_courier", DEFAULT_LIMIT)
 
 def set_courier_order_limit(new_limit):
-    with open(LIMIT_FILE, "w", encoding="utf-8") as f:
-        json.dump({"max_active_orders_per_courier": new_limit}, f, ensure_ascii=False, indent=2)
+    _write_json(LIMIT_FILE, {"max_active_orders_per_courier": new_limit})
 
 def load_inactive_couriers():
     """Load list of inactive couriers for the current week"""
-    if not os.path.exists(INACTIVE_COURIERS_FILE):
-        return []
-    with open(INACTIVE_COURIERS_FILE, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-            return data.get("inactive_couriers", [])
-        except:
+    try:
+        data = _cached_json(INACTIVE_COURIERS_FILE)
+        if data is None:
             return []
+        # копия: вызывающие (add/remove_inactive_courier) меняют список
+        return list(data.get("inactive_couriers", []))
+    except:
+        return []
 
 def save_inactive_couriers(inactive_couriers):
     """Save list of inactive couriers"""
-    with open(INACTIVE_COURIERS_FILE, "w", encoding="utf-8") as f:
-        json.dump({"inactive_couriers": inactive_couriers}, f, ensure_ascii=False, indent=2)
+    _write_json(INACTIVE_COURIERS_FILE, {"inactive_couriers": inactive_couriers})
 
 def add_inactive_courier(courier_id: int):
     """Add a courier to the inactive list"""
@@ -71,46 +104,38 @@ def can_courier_accept_large_order(courier_id: int) -> bool:
     if not counts:
         return True
     
-    # Load inactive couriers and filter them out
-    inactive_couriers = load_inactive_couriers()
-    active_counts = {}
-    for courier_key, info in counts.items():
-        # Skip inactive couriers AND primary admin
-        if courier_key not in inactive_couriers and int(courier_key) != PRIMARY_ADMIN_ID:
-            active_counts[courier_key] = info
+    active_counts = _active_counts(counts, load_inactive_couriers(), PRIMARY_ADMIN_ID)
     
     # If no active couriers have orders, anyone can accept
     if not active_counts:
         return True
     
-    # Get current courier's order count
+    # New min/max in one pass (без промежуточного списка): only this courier's count changes
+    # if they accept; a courier without counts yet isn't part of the comparison (as before)
     courier_key = str(courier_id)
-    current_courier_count = active_counts.get(courier_key, {}).get("count", 0)
-    
-    # Calculate what the new counts would be if this courier accepts
-    new_courier_count = current_courier_count + 1
-    
-    # Create a new list with the updated count for this courier
-    new_order_counts = []
+    new_min_count = new_max_count = None
     for cid, info in active_counts.items():
+        c = info.get("count", 0)
         if cid == courier_key:
-            new_order_counts.append(new_courier_count)
-        else:
-            new_order_counts.append(info.get("count", 0))
-    
-    # Calculate new min and max
-    new_min_count = min(new_order_counts)
-    new_max_count = max(new_order_counts)
-    new_difference = new_max_count - new_min_count
-    
-    # Get the current balance limit dynamically
-    current_limit = get_balance_limit()
-    
-    # Check if the new difference would exceed the limit
-    if new_difference > current_limit:
-        return False
-    
-    return True
+            c += 1
+        if new_min_count is None:
+            new_min_count = new_max_count = c
+        elif c < new_min_count:
+            new_min_count = c
+        elif c > new_max_count:
+            new_max_count = c
+    
+    # Check if the new difference would exceed the current (dynamic) balance limit
+    return new_max_count - new_min_count <= get_balance_limit()
+
+def _active_counts(counts: dict, inactive_couriers, primary_admin_id) -> dict:
+    """Counts without inactive couriers AND primary admin."""
+    inactive = set(inactive_couriers)
+    return {
+        courier_key: info
+        for courier_key, info in counts.items()
+        if courier_key not in inactive and int(courier_key) != primary_admin_id
+    }
 
 def get_large_order_balance_info() -> dict:
     """
@@ -126,11 +151,7 @@ def get_large_order_balance_info() -> dict:
     
     # Load inactive couriers and filter them out
     inactive_couriers = load_inactive_couriers()
-    active_counts = {}
-    for courier_key, info in counts.items():
-        # Skip inactive couriers AND primary admin
-        if courier_key not in inactive_couriers and int(courier_key) != PRIMARY_ADMIN_ID:
-            active_counts[courier_key] = info
+    active_counts = _active_counts(counts, inactive_couriers, PRIMARY_ADMIN_ID)
     
     if not active_counts:
         current_limit = get_balance_limit()
@@ -162,20 +183,17 @@ def get_large_order_balance_info() -> dict:
 
 def get_balance_limit():
     """Get the current balance limit from JSON file"""
-    if not os.path.exists(BALANCE_LIMIT_FILE):
+    try:
+        data = _cached_json(BALANCE_LIMIT_FILE)
+    except:
+        return MAX_LARGE_ORDER_COUNT_DIFFERENCE
+    if data is None:
         # Initialize with default value from config
         set_balance_limit(MAX_LARGE_ORDER_COUNT_DIFFERENCE)
         return MAX_LARGE_ORDER_COUNT_DIFFERENCE
-    
-    with open(BALANCE_LIMIT_FILE, "r", encoding="utf-8") as f:
-        try:
-            data = json.load(f)
-            return data.get("max_large_order_count_difference", MAX_LARGE_ORDER_COUNT_DIFFERENCE)
-        except:
-            return MAX_LARGE_ORDER_COUNT_DIFFERENCE
+    return data.get("max_large_order_count_difference", MAX_LARGE_ORDER_COUNT_DIFFERENCE)
 
 def set_balance_limit(new_limit):
     """Set the balance limit in JSON file for dynamic updates"""
     os.makedirs("data", exist_ok=True)
-    with open(BALANCE_LIMIT_FILE, "w", encoding="utf-8") as f:
-        json.dump({"max_large_order_count_difference": new_limit}, f, ensure_ascii=False, indent=2)
+    _write_json(BALANCE_LIMIT_FILE, {"max_large_order_count_difference": new_limit})
@@ -1,70 +1,162 @@
-import json
+import asyncio
+import os
+import tempfile
 from pathlib import Path
 from datetime import date, timedelta
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
+
+import orjson
 
 # Expected in bot.config
 from bot.config import DATA_FILE, COURIER_DATA_FILE
 
 DRINKS_FILE = Path("data/drinks.json")
+# Absolute path used by load_drinks() (independent of the working directory)
+DRINKS_PATH = Path(__file__).resolve().parent.parent.parent / "data" / "drinks.json"
 # Local data files
 ORDER_INTAKE_STATUS_FILE = Path("data/order_intake_status.json")
 USER_IDS_FILE = Path("data/user_ids.json")
-USER_MESSAGES_FILE = Path("data/user_messages.json")
+USER_MESSAGES_FILE = Path("data/user_messages.json")  # старый формат, читается только для миграции
+USER_MESSAGES_LOG = Path("data/user_messages.jsonl")
+
+# Parsed user_ids.json, reused while the file's (mtime_ns, size) stamp is unchanged
+_user_ids_cache: Dict[str, Any] = {}
+_user_ids_stamp: Tuple[int, int] | None = None
+# Views derived from _user_ids_cache; rebuilt when load_user_ids() returns a new dict
+_username_index: Dict[str, int] = {}
+_username_index_source: Dict[str, Any] | None = None
+_user_ids_int: Dict[int, Any] = {}
+_user_ids_int_source: Dict[str, Any] | None = None
+_user_profiles: Dict[str, Tuple[str | None, str]] = {}
+_user_profiles_source: Dict[str, Any] | None = None
+_UNKNOWN_USER: Tuple[str | None, str] = (None, "en")
+# In-memory user_ids changes not yet on disk (see set_user_record); flushed after a short delay
+USER_IDS_FLUSH_DELAY = 0.5
+_user_ids_dirty = False
+_user_ids_flush_task: "asyncio.Task | None" = None
+
+# ((mtime_ns, size), converted drinks dict) — see load_drinks
+_drinks_cache: "Tuple[Tuple[int, int], dict] | None" = None
+
+# (mtime_ns, enabled) of order_intake_status.json
+_intake_status: "Tuple[int, bool] | None" = None
+
+# courier data: debounced saves (see schedule_courier_data_save)
+COURIER_DATA_FLUSH_DELAY = 0.5
+_courier_data_pending: "Dict[str, Any] | None" = None
+_courier_data_flush_task: "asyncio.Task | None" = None
+_courier_data_writing: "Dict[str, Any] | None" = None  # снят с pending, запись в процессе
+
+# user_messages.jsonl: append-only log replayed into _user_messages once, compacted every N appends
+USER_MESSAGES_COMPACT_EVERY = 500
+_user_messages: "Dict[str, list] | None" = None
+_user_messages_appends = 0
+
+
+# директории, уже созданные этим процессом — повторный mkdir(exist_ok=True) это лишний syscall
+_ensured_dirs: set = set()
+
+
+def ensure_dir(path: Path):
+    """mkdir -p once per process for each directory."""
+    if path not in _ensured_dirs:
+        path.mkdir(parents=True, exist_ok=True)
+        _ensured_dirs.add(path)
 
 
 def get_today_key() -> str:
     return date.today().isoformat()
 
 
+def atomic_write_bytes(file_path: Path, payload: bytes, sync: bool = False):
+    """
+    Writes bytes to a temp file next to file_path and swaps it in with os.replace,
+    so readers never see a truncated file.
+    sync=True also flushes the data to disk before the swap (survives a power loss).
+    """
+    # уникальное имя: отложенная запись в потоке и синхронный flush при остановке не делят один .tmp
+    fd, tmp_name = tempfile.mkstemp(dir=file_path.parent, prefix=file_path.name + ".", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb", buffering=64 * 1024) as f:
+            f.write(payload)
+            if sync:
+                f.flush()
+                _fdatasync(f.fileno())
+        os.replace(tmp_name, file_path)
+    except BaseException:
+        try:
+            os.unlink(tmp_name)
+        except OSError:
+            pass
+        raise
+
+
+# fdatasync есть не везде (macOS/Windows) — там полный fsync
+_fdatasync = getattr(os, "fdatasync", os.fsync)
+
+
 def load_data(file_path: Path, default_data=None):
     """
     Loads JSON data from a file, with optional default data.
     """
     if file_path.exists():
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                return json.load(f)
-        except json.JSONDecodeError:
+            return orjson.loads(file_path.read_bytes())
+        except orjson.JSONDecodeError:
             return default_data if default_data is not None else {}
     return default_data if default_data is not None else {}
 
 def load_drinks():
-    """Loads drinks menu from drinks.json (supports both old and new formats)."""
-    drinks_path = Path(__file__).resolve().parent.parent.parent / "data" / "drinks.json"
-    if drinks_path.exists():
-        try:
-            with open(drinks_path, "r", encoding="utf-8") as f:
-                data = json.load(f)
-
-            # ✅ New structure (dict with categories as keys)
-            if isinstance(data, dict) and "categories" not in data:
-                return data
-
-            # 🕐 Old structure (with categories)
-            if "categories" in data:
-                formatted = {}
-                for cat in data.get("categories", []):
-                    cid = cat.get("id")
-                    cname = cat.get("name", {})
-                    formatted[cid] = {
-                        "name": cname,
-                        "items": {
-                            d.get("id"): {
-                                "ru": d["name"]["ru"],
-                                "en": d["name"]["en"],
-                                "lv": d["name"]["lv"],
-                                "price": d.get("price", 0)
-                            }
-                            for d in cat.get("drinks", [])
-                        },
-                    }
-                return formatted
-
-        except json.JSONDecodeError as e:
-            print(f"[ERROR] Failed to parse drinks.json: {e}")
-    else:
+    """
+    Loads drinks menu from drinks.json (supports both old and new formats).
+    The converted dict is cached until the file's mtime/size changes — shared, don't mutate.
+    """
+    global _drinks_cache
+    drinks_path = DRINKS_PATH
+    try:
+        st = drinks_path.stat()
+    except FileNotFoundError:
         print(f"[WARN] drinks.json not found at {drinks_path}")
+        _drinks_cache = None
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    if _drinks_cache is not None and _drinks_cache[0] == stamp:
+        return _drinks_cache[1]
+
+    try:
+        data = orjson.loads(drinks_path.read_bytes())
+    except orjson.JSONDecodeError as e:
+        print(f"[ERROR] Failed to parse drinks.json: {e}")
+        return {}
+    drinks = _convert_drinks(data)
+    _drinks_cache = (stamp, drinks)
+    return drinks
+
+
+def _convert_drinks(data) -> dict:
+    # ✅ New structure (dict with categories as keys)
+    if isinstance(data, dict) and "categories" not in data:
+        return data
+
+    # 🕐 Old structure (with categories)
+    if "categories" in data:
+        formatted = {}
+        for cat in data.get("categories", []):
+            cid = cat.get("id")
+            cname = cat.get("name", {})
+            formatted[cid] = {
+                "name": cname,
+                "items": {
+                    d.get("id"): {
+                        "ru": d["name"]["ru"],
+                        "en": d["name"]["en"],
+                        "lv": d["name"]["lv"],
+                        "price": d.get("price", 0)
+                    }
+                    for d in cat.get("drinks", [])
+                },
+            }
+        return formatted
 
     return {}
 
@@ -73,9 +165,8 @@ def save_data(file_path: Path, data: Any):
     """
     Saves data to a JSON file.
     """
-    file_path.parent.mkdir(parents=True, exist_ok=True)
-    with open(file_path, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    ensure_dir(file_path.parent)
+    atomic_write_bytes(file_path, orjson.dumps(data, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS))
 
 
 def save_order_counts(user_order_data: Dict[str, Any]):
@@ -85,11 +176,75 @@ def save_order_counts(user_order_data: Dict[str, Any]):
     save_data(DATA_FILE, user_order_data)
 
 
+# int Telegram id в ключах пишем строками (как json.dump)
+_COURIER_DATA_OPTS = orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS
+
+
+def load_courier_data() -> Dict[str, Any]:
+    """
+    Loads courier data. A debounced save that hasn't reached the disk yet wins over
+    the file, so updates made within COURIER_DATA_FLUSH_DELAY are not lost.
+    """
+    unsaved = _courier_data_pending if _courier_data_pending is not None else _courier_data_writing
+    if unsaved is not None:
+        return unsaved
+    return load_data(COURIER_DATA_FILE)
+
+
 def save_courier_data(courier_data: Dict[str, Any]):
     """
-    Saves courier data.
+    Saves courier data (atomic write; drops any pending debounced save).
     """
-    save_data(COURIER_DATA_FILE, courier_data)
+    global _courier_data_pending
+    _courier_data_pending = None
+    _write_courier_data_file(orjson.dumps(courier_data, option=_COURIER_DATA_OPTS))
+
+
+def _write_courier_data_file(payload: bytes):
+    ensure_dir(COURIER_DATA_FILE.parent)
+    atomic_write_bytes(COURIER_DATA_FILE, payload)
+
+
+def schedule_courier_data_save(courier_data: Dict[str, Any]):
+    """
+    Debounced save_courier_data: a burst of courier updates within
+    COURIER_DATA_FLUSH_DELAY seconds ends up as a single disk write.
+    """
+    global _courier_data_pending, _courier_data_flush_task
+    _courier_data_pending = courier_data
+    if _courier_data_flush_task is not None and not _courier_data_flush_task.done():
+        return  # a flush is already pending and will pick this change up
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_courier_data()
+        return
+    _courier_data_flush_task = loop.create_task(_flush_courier_data_later())
+
+
+def flush_courier_data():
+    """Write a pending courier data save now (no-op if nothing is pending)."""
+    if _courier_data_pending is not None:
+        save_courier_data(_courier_data_pending)
+
+
+async def _flush_courier_data_later():
+    global _courier_data_pending, _courier_data_writing
+    await asyncio.sleep(COURIER_DATA_FLUSH_DELAY)
+    # serialize on the loop, write in a worker thread; updates made meanwhile are picked up by the next pass
+    while _courier_data_pending is not None:
+        data, _courier_data_pending = _courier_data_pending, None
+        _courier_data_writing = data  # пока пишется, load_courier_data отдаёт его, а не старый файл
+        try:
+            payload = orjson.dumps(data, option=_COURIER_DATA_OPTS)
+            await asyncio.to_thread(_write_courier_data_file, payload)
+        except Exception as e:
+            print(f"[ERROR] Failed to save courier data: {e}")
+            if _courier_data_pending is None:
+                _courier_data_pending = data  # не теряем — запишется следующим save / flush
+            break
+        finally:
+            _courier_data_writing = None
 
 
 def get_order_path_by_number(order_number: int, fallback_today=True, search_days=3) -> Path | None:
@@ -102,18 +257,15 @@ def get_order_path_by_number(order_number: int, fallback_today=True, search_days
         day = date.today() - timedelta(days=days_ago)
         day_str = day.isoformat()
         order_path = orders_dir / day_str / f"order_{order_number}.json"
-        if order_path.exists():
-            try:
-                with open(order_path, "r", encoding="utf-8") as f:
-                    order_data = json.load(f)
-                order_date = order_data.get("date")
-                if order_date:
-                    correct_path = orders_dir / order_date / f"order_{order_number}.json"
-                    return correct_path if correct_path.exists() else order_path
-                else:
-                    return order_path
-            except Exception:
-                continue
+        try:
+            order_data = orjson.loads(order_path.read_bytes())
+        except Exception:  # нет файла или битый JSON
+            continue
+        order_date = order_data.get("date") if isinstance(order_data, dict) else None
+        if order_date:
+            correct_path = orders_dir / order_date / f"order_{order_number}.json"
+            return correct_path if correct_path.exists() else order_path
+        return order_path
 
     if fallback_today:
         today_str = date.today().isoformat()
@@ -129,8 +281,15 @@ def get_order_intake_status() -> bool:
     Returns True if order intake is enabled, False otherwise.
     Default is True.
     """
-    data = load_data(ORDER_INTAKE_STATUS_FILE, default_data={"enabled": True})
-    return data.get("enabled", True)
+    global _intake_status
+    try:
+        mtime = ORDER_INTAKE_STATUS_FILE.stat().st_mtime_ns
+    except FileNotFoundError:
+        return True
+    if _intake_status is None or _intake_status[0] != mtime:
+        data = load_data(ORDER_INTAKE_STATUS_FILE, default_data={"enabled": True})
+        _intake_status = (mtime, bool(data.get("enabled", True)))
+    return _intake_status[1]
 
 
 def set_order_intake_status(enabled: bool):
@@ -144,18 +303,33 @@ def load_user_ids() -> Dict[str, str | None]:
     """
     Loads user IDs and usernames from user_ids.json as a dictionary.
     Format: { "12345678": "@username", ... }
+    The parsed dict is cached until the file's mtime/size changes, so it is
+    shared between callers — copy it before modifying.
     """
-    USER_IDS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    if USER_IDS_FILE.exists():
-        with open(USER_IDS_FILE, "r", encoding="utf-8") as f:
-            try:
-                data = json.load(f)
-                if isinstance(data, list):
-                    return {str(uid): None for uid in data}
-                return {str(k): v for k, v in data.items()}
-            except json.JSONDecodeError:
-                return {}
-    return {}
+    global _user_ids_cache, _user_ids_stamp
+    if _user_ids_dirty:
+        # pending in-memory changes win over the (older) file
+        return _user_ids_cache
+    try:
+        st = USER_IDS_FILE.stat()
+    except FileNotFoundError:
+        ensure_dir(USER_IDS_FILE.parent)
+        return {}
+    stamp = (st.st_mtime_ns, st.st_size)
+    if stamp == _user_ids_stamp:
+        return _user_ids_cache
+
+    try:
+        data = orjson.loads(USER_IDS_FILE.read_bytes())
+    except orjson.JSONDecodeError:
+        return {}
+    if isinstance(data, list):
+        users = {str(uid): None for uid in data}
+    else:
+        users = {str(k): v for k, v in data.items()}
+
+    _user_ids_cache, _user_ids_stamp = users, stamp
+    return users
 
 
 def save_user_ids(user_dict: Dict[str, str | None]):
@@ -164,9 +338,115 @@ def save_user_ids(user_dict: Dict[str, str | None]):
     """
     if not user_dict:
         return
-    USER_IDS_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(USER_IDS_FILE, "w", encoding="utf-8") as f:
-        json.dump(dict(user_dict), f, ensure_ascii=False, indent=2)
+    global _user_ids_cache, _user_ids_stamp, _user_ids_dirty
+    users = dict(user_dict)
+    stamp = _write_user_ids_file(orjson.dumps(users, option=orjson.OPT_INDENT_2))
+    _user_ids_cache, _user_ids_stamp, _user_ids_dirty = users, stamp, False
+
+
+def set_user_record(user_id: int, record: Any) -> bool:
+    """
+    Sets one user's entry in the cached user_ids dict and schedules a debounced write.
+    Returns False (and writes nothing) if the entry is already equal to record.
+    """
+    global _user_ids_cache, _user_ids_dirty
+    users = load_user_ids()
+    key = str(user_id)
+    if users.get(key) == record:
+        return False
+    users = dict(users)  # the cached dict is shared with readers — replace, don't mutate
+    users[key] = record
+    _user_ids_cache, _user_ids_dirty = users, True
+    _schedule_user_ids_flush()
+    return True
+
+
+def flush_user_ids():
+    """Write pending user_ids changes to disk now (no-op if nothing changed)."""
+    if _user_ids_dirty:
+        save_user_ids(_user_ids_cache)
+
+
+def _schedule_user_ids_flush():
+    global _user_ids_flush_task
+    if _user_ids_flush_task is not None and not _user_ids_flush_task.done():
+        return  # a flush is already pending and will pick this change up
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        flush_user_ids()
+        return
+    _user_ids_flush_task = loop.create_task(_flush_user_ids_later())
+
+
+async def _flush_user_ids_later():
+    global _user_ids_dirty, _user_ids_stamp
+    await asyncio.sleep(USER_IDS_FLUSH_DELAY)
+    # the file write runs in a worker thread; changes made meanwhile set the dirty flag again
+    while _user_ids_dirty:
+        users = _user_ids_cache
+        _user_ids_dirty = False
+        try:
+            payload = orjson.dumps(users, option=orjson.OPT_INDENT_2)
+            stamp = await asyncio.to_thread(_write_user_ids_file, payload)
+        except Exception as e:
+            print(f"[ERROR] Failed to save user ids: {e}")
+            _user_ids_dirty = True  # не теряем — запишется следующим set_user_record / flush
+            break
+        if _user_ids_cache is users:
+            _user_ids_stamp = stamp
+
+
+def _write_user_ids_file(payload: bytes) -> Tuple[int, int]:
+    ensure_dir(USER_IDS_FILE.parent)
+    atomic_write_bytes(USER_IDS_FILE, payload)
+    st = USER_IDS_FILE.stat()
+    return st.st_mtime_ns, st.st_size
+
+
+def load_user_ids_int() -> Dict[int, Any]:
+    """
+    Same data as load_user_ids(), but keyed by int user_id so broadcasts don't
+    re-parse every key. Rebuilt only when user_ids.json changes.
+    """
+    global _user_ids_int, _user_ids_int_source
+    users = load_user_ids()
+    if users is _user_ids_int_source:
+        return _user_ids_int
+
+    _user_ids_int = {int(uid): info for uid, info in users.items() if uid.isdigit()}
+    _user_ids_int_source = users
+    return _user_ids_int
+
+
+def load_username_index() -> Dict[str, int]:
+    """
+    Returns a lookup of lowercase username (without '@') -> user_id built from user_ids.json.
+    Supports both { "123": "@name" } and { "123": {"@name": "lang"} } entries.
+    The index is rebuilt only when user_ids.json changes.
+    """
+    global _username_index, _username_index_source
+    users = load_user_ids()
+    if users is _username_index_source:
+        return _username_index
+
+    index: Dict[str, int] = {}
+    for uid, info in users.items():
+        if not uid.isdigit():
+            continue
+        if isinstance(info, dict):
+            names = info.keys()
+        elif isinstance(info, str):
+            names = (info,)
+        else:
+            continue
+        for uname in names:
+            key = uname.lstrip("@").lower()
+            if key:
+                index.setdefault(key, int(uid))
+
+    _username_index, _username_index_source = index, users
+    return index
 
 
 def add_or_update_user(user_id: int, username: str | None = None):
@@ -174,7 +454,7 @@ def add_or_update_user(user_id: int, username: str | None = None):
     Adds or updates a user in user_ids.json.
     If username is provided, it's saved or updated.
     """
-    user_dict = load_user_ids()
+    user_dict = dict(load_user_ids())
     user_id_str = str(user_id)
 
     if username and username.strip():
@@ -198,45 +478,119 @@ def resolve_user_identifier(identifier: str) -> int | None:
         return int(identifier) if identifier in users else None
 
     if identifier.startswith("@"):
-        username = identifier.lower()
-        for uid, uname in users.items():
-            if uname and uname.lower() == username:
-                return int(uid)
+        # O(1) через индекс username -> id (пересобирается только при изменении user_ids.json)
+        return load_username_index().get(identifier.lstrip("@").lower())
 
     return None
 
+def load_user_profiles() -> Dict[str, Tuple[str | None, str]]:
+    """
+    user_ids.json normalised to { "123": (username without '@' or None, lang) }.
+    Rebuilt only when user_ids.json changes, so lookups need no isinstance/lstrip.
+    """
+    global _user_profiles, _user_profiles_source
+    users = load_user_ids()
+    if users is _user_profiles_source:
+        return _user_profiles
+
+    profiles: Dict[str, Tuple[str | None, str]] = {}
+    for uid, entry in users.items():
+        if isinstance(entry, dict):
+            key = next(iter(entry), None)
+            if key is None:
+                profiles[uid] = (None, "en")
+            else:
+                profiles[uid] = (key.lstrip("@") or None, entry[key] or "en")
+        elif isinstance(entry, str):
+            profiles[uid] = (entry.lstrip("@") or None, "en")
+        else:
+            profiles[uid] = (None, "en")
+
+    _user_profiles, _user_profiles_source = profiles, users
+    return profiles
+
+
+def resolve_user(user_id: int) -> Tuple[str | None, str]:
+    """
+    Returns (username without '@', lang) for a user from user_ids.json in one lookup.
+    Supports { "123": "@name" } and { "123": {"@name": "lang"} }; lang defaults to "en".
+    """
+    return load_user_profiles().get(str(user_id), _UNKNOWN_USER)
+
 def load_user_messages() -> dict:
     """
-    Loads all stored message IDs per user from data/user_messages.json.
-    Format: { "123456": [111, 222, 333], ... }
+    Returns stored message IDs per user: { "123456": [111, 222, 333], ... }
+    Replays data/user_messages.jsonl on first use (falling back to the old
+    user_messages.json), then serves the in-memory copy. Shared dict — don't mutate.
     """
-    if USER_MESSAGES_FILE.exists():
-        with open(USER_MESSAGES_FILE, "r", encoding="utf-8") as f:
-            try:
-                return json.load(f)
-            except json.JSONDecodeError:
-                return {}
-    return {}
+    global _user_messages
+    if _user_messages is None:
+        _user_messages = _replay_user_messages()
+    return _user_messages
+
+def _replay_user_messages() -> Dict[str, list]:
+    try:
+        raw = USER_MESSAGES_LOG.read_bytes()
+    except FileNotFoundError:
+        legacy = load_data(USER_MESSAGES_FILE)
+        if legacy and isinstance(legacy, dict):
+            # миграция: снимок старого json становится началом лога
+            save_user_messages(legacy)
+            return _user_messages
+        return {}
+
+    data: Dict[str, list] = {}
+    for line in raw.splitlines():
+        try:
+            rec = orjson.loads(line)
+        except orjson.JSONDecodeError:
+            continue  # недописанная последняя строка после падения
+        uid = str(rec.get("u"))
+        if rec.get("clear"):
+            data.pop(uid, None)
+        elif "ms" in rec:
+            data[uid] = list(rec["ms"])
+        elif "m" in rec:
+            mids = data.setdefault(uid, [])
+            if rec["m"] not in mids:
+                mids.append(rec["m"])
+    return data
+
+def _append_user_messages_log(record: Dict[str, Any]):
+    global _user_messages_appends
+    ensure_dir(USER_MESSAGES_LOG.parent)
+    with open(USER_MESSAGES_LOG, "ab") as f:
+        f.write(orjson.dumps(record) + b"\n")
+    _user_messages_appends += 1
+    if _user_messages_appends >= USER_MESSAGES_COMPACT_EVERY:
+        flush_user_messages()
 
 def save_user_messages(data: dict):
     """
-    Saves message IDs per user to data/user_messages.json.
+    Replaces all stored message IDs: rewrites the log as one snapshot line per user.
     """
-    USER_MESSAGES_FILE.parent.mkdir(parents=True, exist_ok=True)
-    with open(USER_MESSAGES_FILE, "w", encoding="utf-8") as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    global _user_messages, _user_messages_appends
+    _user_messages = {str(uid): list(mids) for uid, mids in data.items()}
+    payload = b"".join(orjson.dumps({"u": uid, "ms": mids}) + b"\n" for uid, mids in _user_messages.items())
+    ensure_dir(USER_MESSAGES_LOG.parent)
+    atomic_write_bytes(USER_MESSAGES_LOG, payload)
+    _user_messages_appends = 0
+
+def flush_user_messages():
+    """Compact user_messages.jsonl (no-op if nothing was appended since the last compaction)."""
+    if _user_messages is not None and _user_messages_appends:
+        save_user_messages(_user_messages)
 
 def add_user_message(user_id: int, message_id: int):
     """
-    Adds a new message_id for a given user_id to user_messages.json.
+    Adds a new message_id for a given user_id (one appended line in user_messages.jsonl).
     """
     data = load_user_messages()
     uid = str(user_id)
-    if uid not in data:
-        data[uid] = []
-    if message_id not in data[uid]:
-        data[uid].append(message_id)
-    save_user_messages(data)
+    mids = data.setdefault(uid, [])
+    if message_id not in mids:
+        mids.append(message_id)
+        _append_user_messages_log({"u": uid, "m": message_id})
 
 def clear_user_messages(user_id: int):
     """
@@ -246,4 +600,4 @@ def clear_user_messages(user_id: int):
     uid = str(user_id)
     if uid in data:
         del data[uid]
-        save_user_messages(data)
\ No newline at end of file
+        _append_user_messages_log({"u": uid, "clear": True})
\ No newline at end of file
@@ -0,0 +1,16 @@
+from decimal import Decimal, InvalidOperation, ROUND_HALF_UP
+
+_CENT = Decimal("0.01")
+
+
+def to_cents(value) -> int:
+    """
+    Price-like value (int/float/str/Decimal) -> integer cents, rounded half-up like money_decimal
+    (2.345 -> 235, not float's 234). Bad values count as 0.
+    """
+    if type(value) is int:
+        return value * 100
+    try:
+        return int(Decimal(str(value)).quantize(_CENT, rounding=ROUND_HALF_UP).scaleb(2))
+    except (InvalidOperation, TypeError, ValueError, OverflowError):
+        return 0
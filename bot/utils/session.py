@@ -1,14 +1,64 @@
 import asyncio
-from bot.config import ADMIN_IDS
+import logging
+import weakref
+from functools import partial
 
-user_sessions = {}
-session_locks = {}  # Add locks for each user session
+from cachetools import TTLCache
+from telegram.error import BadRequest, Forbidden
+
+logger = logging.getLogger(__name__)
+
+
+class Session:
+    """
+    Per-user flow state. Fixed fields in __slots__ instead of a dict per session;
+    item access (session["step"], session.get("step")) is kept for dict-style callers.
+    """
+    __slots__ = ("step", "flow_type", "client_messages", "user_messages")
+
+    def __init__(self, step=None, flow_type="unknown"):
+        self.step = step
+        self.flow_type = flow_type
+        # множества: один и тот же id, записанный дважды, удаляется одним запросом
+        self.client_messages = set()
+        self.user_messages = set()
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        try:
+            setattr(self, key, value)
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def get(self, key, default=None):
+        return getattr(self, key, default) if isinstance(key, str) else default
+
+
+# user_id -> Session. Брошенные посреди сценария сессии вытесняются сами
+# (TTL + LRU, как сессии заказа в handlers/order.py); их сообщения просто остаются в чате
+SESSION_TTL_SECONDS = 3600
+SESSION_MAX = 50_000
+user_sessions = TTLCache(maxsize=SESSION_MAX, ttl=SESSION_TTL_SECONDS)
+# user_id -> Lock. Слабые ссылки: лок живёт, пока его кто-то держит или ждёт
+# (локальная переменная в safe_session_operation), потом запись исчезает сама
+session_locks = weakref.WeakValueDictionary()
+
+def start_session(user_id: int, step=None, flow_type: str = "unknown") -> Session:
+    """Create (or replace) the session for a user."""
+    session = user_sessions[user_id] = Session(step, flow_type)
+    return session
 
 def get_user_lock(user_id: int):
     """Get or create a lock for a specific user session."""
-    if user_id not in session_locks:
-        session_locks[user_id] = asyncio.Lock()
-    return session_locks[user_id]
+    lock = session_locks.get(user_id)
+    if lock is None:
+        lock = session_locks[user_id] = asyncio.Lock()
+    return lock
 
 async def safe_session_operation(user_id: int, operation):
     """Safely perform operations on user sessions with locking."""
@@ -20,46 +70,61 @@ async def delete_client_messages(user_id: int, context):
     """Deletes all tracked messages for a given client and clears their session."""
     try:
         session_data = user_sessions.get(user_id, None)
-        if session_data:
-            all_messages_to_delete = []
-            all_messages_to_delete.extend(session_data.get("client_messages", []))
-            all_messages_to_delete.extend(session_data.get("user_messages", []))
-
-            # Delete messages with better error handling
-            for msg_id in all_messages_to_delete:
-                try:
-                    await context.bot.delete_message(chat_id=user_id, message_id=msg_id)
-                except Exception as e:
-                    # Do not log user or message IDs to avoid leaking PII
-                    # Just silently continue if message doesn't exist or can't be deleted
-                    pass
-            
-            # Clear the message lists but keep the session
-            session_data["client_messages"] = []
-            session_data["user_messages"] = []
-    except Exception as e:
-        print(f"[ERROR] Error in delete_client_messages for user {user_id}: {e}")
+        if session_data is not None:
+            await _delete_session_messages(user_id, session_data, context.bot.delete_message)
+    except Exception:
+        logger.exception("delete_client_messages failed for user %s", user_id)
+
+async def _delete_session_messages(user_id: int, session_data: Session, delete_message):
+    cm, um = session_data.client_messages, session_data.user_messages
+    if not cm and not um:
+        return  # частый случай (повторный /start, таймаут) — нечего удалять
+    all_messages_to_delete = cm | um
+
+    # Удаляем параллельно, но не больше 5 запросов одновременно в один чат.
+    # Уже удалённые / недоступные сообщения (BadRequest / Forbidden) молча пропускаем
+    # (и не логируем user/message id, чтобы не светить PII) — TaskGroup их соседей не отменит.
+    # Сетевые ошибки и отмена очистки пробрасываются и гасят все запросы в полёте
+    sem = asyncio.Semaphore(5)
+
+    async def _del(msg_id):
+        async with sem:
+            try:
+                await delete_message(chat_id=user_id, message_id=msg_id)
+            except (BadRequest, Forbidden):
+                pass
+
+    async with asyncio.TaskGroup() as tg:
+        for m in all_messages_to_delete:
+            tg.create_task(_del(m))
+
+    # Clear the deleted ids but keep the session (ids tracked during the awaits stay)
+    session_data.client_messages -= all_messages_to_delete
+    session_data.user_messages -= all_messages_to_delete
 
 async def cleanup_user_session(user_id: int, context):
     """Safely cleanup a user session with proper locking."""
-    async def _cleanup():
-        try:
-            if user_id in user_sessions:
-                await delete_client_messages(user_id, context)
-                user_sessions.pop(user_id, None)
-            if user_id in session_locks:
-                session_locks.pop(user_id, None)
-        except Exception as e:
-            print(f"[ERROR] Error cleaning up session for user {user_id}: {e}")
-    
-    await safe_session_operation(user_id, _cleanup)
+    # в операцию передаём только bot.delete_message, а не весь context
+    # (update, chat_data, job_queue не держатся ссылкой на время ожидания лока)
+    await safe_session_operation(user_id, partial(_cleanup_session, user_id, context.bot.delete_message))
+
+async def _cleanup_session(user_id: int, delete_message):
+    try:
+        # один pop вместо "in" + delete + pop; сообщения удаляем по уже снятой сессии
+        session_data = user_sessions.pop(user_id, None)
+        if session_data is not None:
+            await _delete_session_messages(user_id, session_data, delete_message)
+    except Exception:
+        logger.exception("cleanup_user_session failed for user %s", user_id)
 
 def is_session_active(user_id: int) -> bool:
     """Check if a user has an active session."""
-    return user_id in user_sessions and user_sessions[user_id].get("step") is not None
+    session = user_sessions.get(user_id)
+    return session is not None and session.step is not None
 
 def get_session_flow_type(user_id: int) -> str:
     """Get the flow type of a user's session."""
-    if user_id in user_sessions:
-        return user_sessions[user_id].get("flow_type", "unknown")
+    session = user_sessions.get(user_id)
+    if session is not None:
+        return session.flow_type
     return "none"
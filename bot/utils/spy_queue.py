@@ -0,0 +1,110 @@
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Dict, List, Optional, Tuple
+
+from telegram.constants import ParseMode
+from telegram.error import RetryAfter
+
+from bot.utils.rate_limit import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+SPY_SEPARATOR = "\n\n━━━━\n\n"
+MAX_MESSAGE_LEN = 4096
+
+
+class SpyNotifier:
+    """
+    Очередь spy-уведомлений админам.
+    Каждые `flush_interval` секунд сообщения для одного админа склеиваются
+    в одно (до 4096 символов) и отправляются с ограничением 30 msg/s.
+    """
+
+    def __init__(self, flush_interval: float = 0.5, rate: int = 30, max_concurrent: int = 20):
+        self.flush_interval = flush_interval
+        self._limiter = RateLimiter(rate)
+        # не больше max_concurrent запросов в полёте одновременно
+        self._semaphore = asyncio.Semaphore(max_concurrent)
+        self._queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self, bot) -> None:
+        """Start the consumer task (no-op if it's already running)."""
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run(bot))
+
+    async def stop(self) -> None:
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    def enqueue(self, admin_id: int, text: str) -> None:
+        self._queue.put_nowait((admin_id, text))
+
+    async def _run(self, bot):
+        while True:
+            first = await self._queue.get()
+            # даём набежать остальным событиям этого окна
+            await asyncio.sleep(self.flush_interval)
+
+            pending: Dict[int, List[str]] = {first[0]: [first[1]]}
+            while not self._queue.empty():
+                admin_id, text = self._queue.get_nowait()
+                pending.setdefault(admin_id, []).append(text)
+
+            # админы — параллельно, сообщения одному админу — по порядку
+            # (_send сам глотает ошибки, так что TaskGroup не отменит соседние отправки)
+            async with asyncio.TaskGroup() as tg:
+                for admin_id, texts in pending.items():
+                    tg.create_task(self._flush_admin(bot, admin_id, texts))
+
+    async def _flush_admin(self, bot, admin_id: int, texts: List[str]):
+        for chunk in _join_chunks(texts):
+            await self._send(bot, admin_id, chunk)
+
+    async def _send(self, bot, admin_id: int, text: str):
+        async with self._semaphore:
+            for attempt in range(2):
+                await self._limiter.acquire()
+                try:
+                    await bot.send_message(
+                        chat_id=admin_id,
+                        text=text,
+                        parse_mode=ParseMode.HTML,
+                        disable_web_page_preview=True,
+                    )
+                    return
+                except RetryAfter as e:
+                    # упёрлись в лимит Telegram — ждём и пробуем ещё раз (один раз)
+                    if attempt:
+                        logger.warning(f"[spy] admin {admin_id} hit flood limit twice, skipping")
+                        return
+                    delay = e.retry_after
+                    if isinstance(delay, timedelta):
+                        delay = delay.total_seconds()
+                    await asyncio.sleep(delay)
+                except Exception as e:
+                    logger.warning(f"[spy] send to admin {admin_id} failed: {e}")
+                    return
+
+
+def _join_chunks(texts: List[str]) -> List[str]:
+    """Join texts with SPY_SEPARATOR, starting a new chunk before MAX_MESSAGE_LEN is exceeded."""
+    chunks: List[str] = []
+    current = ""
+    for text in texts:
+        if not current:
+            current = text
+        elif len(current) + len(SPY_SEPARATOR) + len(text) <= MAX_MESSAGE_LEN:
+            current += SPY_SEPARATOR + text
+        else:
+            chunks.append(current)
+            current = text
+    if current:
+        chunks.append(current)
+    return chunks
+
+
+notifier = SpyNotifier()